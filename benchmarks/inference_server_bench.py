@@ -0,0 +1,166 @@
+# N FocusFrame instances with their own model each vs. the same N sharing one
+# 'serve' daemon.
+#
+#   python benchmarks/inference_server_bench.py --clients 4 --calls 50
+#
+# Every client is its own process and calls YOLODetector.analyze on synthetic
+# frames as fast as it can. Reported per mode: aggregate frames/s, per-call
+# latency and the summed peak RSS of every process involved.
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from focus_frame import Config
+from pipeline_bench import percentile, environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELUDE = r"""
+import sys, json, time, resource
+sys.path.insert(0, {root!r})
+import numpy as np
+import focus_frame
+config = focus_frame.Config()
+config.MODEL_NAME = {model!r}
+config.INFERENCE_BACKEND = {backend!r}
+config.IMGSZ = {imgsz!r}
+rss_mb = lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+"""
+
+SERVER = PRELUDE + r"""
+server = focus_frame.InferenceServer(config, {socket!r}, {max_batch!r}, {max_latency!r})
+try:
+    server.serve()
+finally:
+    print("RESULT " + json.dumps({{"rss_mb": rss_mb(), "batches": server.batches, "frames": server.frames}}),
+          flush=True)
+"""
+
+CLIENT = PRELUDE + r"""
+config.INFERENCE_SERVER = {socket!r}
+detector = focus_frame.YOLODetector.from_config(config)
+rng = np.random.default_rng({seed!r})
+frames = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(4)]
+print("READY", flush=True)
+sys.stdin.readline()
+timings = []
+for i in range({calls!r}):
+    start = time.perf_counter()
+    detector.analyze(frames[i % len(frames)])
+    timings.append(time.perf_counter() - start)
+print("RESULT " + json.dumps({{"timings": timings, "rss_mb": rss_mb(), "backend": detector.backend}}), flush=True)
+"""
+
+
+def result_of(proc):
+    out, _ = proc.communicate(timeout=600)
+    for line in out.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[7:])
+    raise RuntimeError(f"benchmark process failed:\n{out}")
+
+
+def wait_for(proc, marker):
+    for line in proc.stdout:
+        if line.startswith(marker):
+            return
+    raise RuntimeError(f"benchmark process exited before '{marker}'")
+
+
+def run_mode(args, socket_path):
+    params = {"root": ROOT, "model": args.model, "backend": args.backend, "imgsz": args.imgsz,
+              "socket": socket_path, "calls": args.calls}
+    server = None
+    if socket_path is not None:
+        code = SERVER.format(max_batch=args.max_batch, max_latency=args.max_latency_ms / 1000, **params)
+        server = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT, text=True)
+        wait_for(server, f">>> {Config.APP_NAME}: INFERENCE SERVER")
+
+    clients = [subprocess.Popen([sys.executable, "-c", CLIENT.format(seed=i, **params)], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+               for i in range(args.clients)]
+    for client in clients:
+        wait_for(client, "READY")
+
+    # Release every client at once so their requests overlap
+    started = time.perf_counter()
+    for client in clients:
+        client.stdin.write("\n")
+        client.stdin.flush()
+    results = [result_of(client) for client in clients]
+    wall = time.perf_counter() - started
+
+    rss = sum(r["rss_mb"] for r in results)
+    batching = {}
+    if server is not None:
+        server.send_signal(signal.SIGINT)
+        stats = result_of(server)
+        rss += stats["rss_mb"]
+        batching = {"batches": stats["batches"],
+                    "frames_per_batch": stats["frames"] / stats["batches"] if stats["batches"] else 0.0}
+
+    timings = sorted(t for r in results for t in r["timings"])
+    return dict({
+        "clients": args.clients,
+        "backend": results[0]["backend"],
+        "throughput_per_s": len(timings) / wall if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": 1000 * sum(timings) / len(timings),
+            "p50": 1000 * percentile(timings, 0.50),
+            "p95": 1000 * percentile(timings, 0.95),
+            "max": 1000 * timings[-1],
+        },
+        "total_rss_mb": rss,
+    }, **batching)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusFrame shared inference server benchmark")
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=50, help="analyze() calls per client")
+    parser.add_argument('--model', default=Config.MODEL_NAME)
+    parser.add_argument('--backend', default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--imgsz', type=int, default=Config.IMGSZ)
+    parser.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    parser.add_argument('--max-latency-ms', type=float, default=Config.INFERENCE_MAX_LATENCY_MS)
+    parser.add_argument('--output', help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stages = {
+            "local_models": run_mode(args, None),
+            "shared_server": run_mode(args, os.path.join(tmpdir, "inference.sock")),
+        }
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "parameters": {"model": args.model, "backend": args.backend, "imgsz": args.imgsz,
+                       "max_batch": args.max_batch, "max_latency_ms": args.max_latency_ms},
+        "stages": stages,
+    }
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, stage in stages.items():
+        lat = stage["latency_ms"]
+        print(f"{name:<14} {stage['throughput_per_s']:7.1f} frames/s  p50 {lat['p50']:8.1f} ms  "
+              f"p95 {lat['p95']:8.1f} ms  {stage['total_rss_mb']:8.0f} MB total RSS", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Micro-benchmark: legacy full-resolution motion check vs. MotionDetector.
+#
+#   python benchmarks/motion_bench.py --width 1920 --height 1080 --frames 300
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from focus_frame import Config, MotionDetector
+
+
+# The detect_motion body MotionDetector replaced, kept here as the baseline
+class LegacyMotion:
+    def __init__(self, pixel_threshold):
+        self.pixel_threshold = pixel_threshold
+        self.prev_gray = None
+    
+    def detect(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        motion_detected = False
+        if self.prev_gray is not None:
+            diff = cv2.absdiff(gray, self.prev_gray)
+            _, th = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
+            motion_detected = cv2.countNonZero(th) > self.pixel_threshold
+        self.prev_gray = gray
+        return motion_detected
+
+
+def make_frames(width, height, count, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        # A block sweeping across the frame stands in for someone moving
+        x = (i * width // count) % max(1, width - width // 8)
+        frame[height // 4:height // 2, x:x + width // 8] = 255
+        frames.append(frame)
+    return frames
+
+
+def run(detector, frames, repeat):
+    for frame in frames[:5]:
+        detector.detect(frame)
+    
+    timings = []
+    for _ in range(repeat):
+        for frame in frames:
+            start = time.perf_counter()
+            detector.detect(frame)
+            timings.append(time.perf_counter() - start)
+    
+    # Bytes allocated per frame once warmed up
+    tracemalloc.start()
+    for frame in frames:
+        detector.detect(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    timings.sort()
+    return {
+        "mean_ms": 1000 * sum(timings) / len(timings),
+        "p95_ms": 1000 * timings[int(0.95 * (len(timings) - 1))],
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motion detection micro-benchmark")
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    frames = make_frames(args.width, args.height, args.frames)
+    candidates = [
+        ("legacy", LegacyMotion(Config.MOTION_PIXEL_THRESHOLD)),
+        (f"diff@{Config.MOTION_WIDTH}", MotionDetector(Config.MOTION_PIXEL_THRESHOLD, Config.MOTION_WIDTH, "diff")),
+        ("diff@full", MotionDetector(Config.MOTION_PIXEL_THRESHOLD, 0, "diff")),
+        (f"mog2@{Config.MOTION_WIDTH}", MotionDetector(Config.MOTION_PIXEL_THRESHOLD, Config.MOTION_WIDTH, "mog2")),
+        (f"knn@{Config.MOTION_WIDTH}", MotionDetector(Config.MOTION_PIXEL_THRESHOLD, Config.MOTION_WIDTH, "knn")),
+    ]
+    
+    print(f"{args.width}x{args.height}, {args.frames} frames x {args.repeat}")
+    print(f"{'detector':<14}{'mean ms':>10}{'p95 ms':>10}{'peak alloc KB':>16}")
+    for name, detector in candidates:
+        r = run(detector, frames, args.repeat)
+        print(f"{name:<14}{r['mean_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['peak_alloc_kb']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# Per-stage and end-to-end benchmark for the frame pipeline.
+#
+#   python benchmarks/pipeline_bench.py --output bench.json
+#   python benchmarks/pipeline_bench.py --compare baseline.json --tolerance 0.15
+#
+# Every stage is timed on synthetic frames (plus a generated clip for the
+# end-to-end replay), and the results are written as JSON with a fixed schema
+# so runs from different releases / machines can be diffed. --compare exits
+# non-zero when a stage got slower than the baseline by more than --tolerance.
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import copy
+import datetime
+import tempfile
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from focus_frame import (Config, PresenceDetector, YOLODetector, DistractionMonitor, DistractionRules,
+                         EventLogger, ReportGenerator, FocusFrameEngine, ReplaySource, ProcessPipeline)
+from motion_bench import make_frames
+
+SCHEMA_VERSION = 1
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def measure(fn, iterations, warmup=3):
+    for i in range(warmup):
+        fn(i)
+
+    timings = []
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        timings.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": iterations / wall if wall > 0 else 0.0,
+        "latency_ms": {
+            "mean": 1000 * sum(timings) / len(timings),
+            "p50": 1000 * percentile(timings, 0.50),
+            "p90": 1000 * percentile(timings, 0.90),
+            "p95": 1000 * percentile(timings, 0.95),
+            "p99": 1000 * percentile(timings, 0.99),
+            "max": 1000 * timings[-1],
+        },
+        "cpu_ms_per_op": 1000 * cpu / iterations,
+        "cpu_utilization": cpu / wall if wall > 0 else 0.0,
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def make_clip(path, frames, fps=30):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def make_events(count):
+    kinds = [("Camera", "User returned"), ("Distraction", "User Away from Desk"),
+             ("Distraction", "Cell Phone Detected"), ("Distraction", "App: youtube - video"),
+             ("System", "Pomodoro Cycle 1/4 - WORK (25 min)")]
+    start = datetime.datetime(2026, 1, 1, 9, 0, 0).timestamp()
+    return [{"ts": start + i, "time": f"{9 + i // 3600 % 12:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+             "source": kinds[i % len(kinds)][0], "message": kinds[i % len(kinds)][1]}
+            for i in range(count)]
+
+
+def bench_stages(config, frames, args, tmpdir):
+    stages = {}
+    n = len(frames)
+
+    presence = PresenceDetector(config)
+    stages["detect_motion"] = measure(lambda i: presence.detect_motion(frames[i % n]), args.iterations)
+
+    if not args.skip_yolo:
+        detector = YOLODetector(config.MODEL_NAME, [config.CLASS_PERSON, config.CLASS_PHONE],
+                                config.CONF_THRESHOLD, backend=config.INFERENCE_BACKEND,
+                                imgsz=config.IMGSZ, cache_dir=config.MODEL_CACHE_DIR)
+        last = {}
+
+        def analyze(i):
+            last["results"] = detector.analyze(frames[i % n])[0]
+
+        stages["yolo_analyze"] = measure(analyze, args.yolo_iterations)
+        stages["results_plot"] = measure(lambda i: last["results"][0].plot(), args.yolo_iterations)
+
+    monitor = DistractionMonitor(config.DISTRACTION_KEYWORDS)
+    stages["check_distractions"] = measure(lambda i: monitor.check_distractions(), args.iterations)
+    stages["window_title_query"] = measure(lambda i: monitor.get_active_window_title(), args.iterations)
+
+    rules = DistractionRules(deny=[f"blocked-site-{i}.example" for i in range(args.rules)]
+                             + config.DISTRACTION_KEYWORDS)
+    titles = [f"reading blocked-site-{i}.example - mozilla firefox" for i in range(0, args.rules, 97)]
+    stages["keyword_match"] = measure(lambda i: rules.is_distraction(titles[i % len(titles)]), args.iterations)
+    stages["keyword_match"]["rules"] = args.rules
+
+    logger = EventLogger(echo=False)
+    stages["event_log"] = measure(lambda i: logger.log("Distraction", "Cell Phone Detected"), args.iterations)
+
+    journaled = EventLogger(echo=False, journal_dir=os.path.join(tmpdir, "sessions"))
+    journaled.start_session(datetime.datetime(2026, 1, 1, 9, 0, 0))
+    stages["event_log_journal"] = measure(lambda i: journaled.log("Distraction", "Cell Phone Detected"),
+                                          args.iterations)
+    journaled.end_session(datetime.datetime(2026, 1, 1, 17, 0, 0))
+
+    events = make_events(args.report_events)
+    start = datetime.datetime(2026, 1, 1, 9, 0, 0)
+    end = start + datetime.timedelta(seconds=len(events))
+    report = os.path.join(tmpdir, "report.html")
+    stages["report_generate"] = measure(
+        lambda i: ReportGenerator.generate(events, start, end, report, open_browser=False),
+        args.report_iterations, warmup=1)
+    stages["report_generate"]["events"] = len(events)
+
+    return stages
+
+
+def bench_end_to_end(config, frames, args, tmpdir):
+    clip = args.clip
+    if clip is None:
+        clip = os.path.join(tmpdir, "clip.avi")
+        make_clip(clip, frames)
+
+    engine = FocusFrameEngine(config, interactive=False)
+    source = ReplaySource(clip, start_epoch=0)
+    source.start()
+    engine.is_monitoring = True
+    engine._reset_components(0)
+    engine.logger.clock = lambda: source.last_frame_time
+
+    def step(i):
+        ret, frame = source.read()
+        if not ret:
+            source.stop()
+            source.cap = cv2.VideoCapture(clip)
+            ret, frame = source.read()
+        engine._process_frame(frame, source.last_frame_time)
+
+    result = measure(step, args.e2e_frames)
+    result["inferences"] = engine.scheduler.inferences
+    result["inferences_skipped"] = engine.scheduler.skipped
+    source.stop()
+    return result
+
+
+# Inference-bound throughput (YOLO on every frame) of the threaded loop vs. the
+# multi-process pipeline on the same clip
+def bench_pipeline(config, frames, args, tmpdir):
+    config = copy.copy(config)
+    config.INFERENCE_POLICY = "always"
+    config.PIPELINE_WORKERS = args.pipeline_workers
+    clip = os.path.join(tmpdir, "pipeline_clip.avi")
+    # Long enough that neither loop has to rewind
+    make_clip(clip, frames * (args.e2e_frames // len(frames) + 2))
+    
+    stages = {}
+    for name in ("e2e_threaded_always", "e2e_pipeline_always"):
+        if name == "e2e_pipeline_always":
+            # Like the app: the workers hold the models, the coordinator none
+            engine = FocusFrameEngine(config, interactive=False, detector=YOLODetector.from_config(config, load=False))
+            source = ProcessPipeline(clip, config)
+        else:
+            engine = FocusFrameEngine(config, interactive=False)
+            source = ReplaySource(clip, start_epoch=0)
+        if not source.start():
+            raise RuntimeError(f"{name}: could not start {clip}")
+        engine.source = source
+        engine.is_monitoring = True
+        engine._reset_components(0)
+        
+        def step(i):
+            ret, frame = source.read()
+            engine._process_frame(frame, source.last_frame_time)
+        
+        stages[name] = measure(step, args.e2e_frames)
+        source.stop()
+    
+    stages["e2e_pipeline_always"]["workers"] = args.pipeline_workers
+    return stages
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes everywhere else
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for name, stage in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        for metric in ("p50", "p95"):
+            old, new = base["latency_ms"][metric], stage["latency_ms"][metric]
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} ms (+{100 * (new / old - 1):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusFrame pipeline benchmark")
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--frames', type=int, default=60, help="Distinct synthetic frames to cycle through")
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--yolo-iterations', type=int, default=30)
+    parser.add_argument('--e2e-frames', type=int, default=150)
+    parser.add_argument('--pipeline-workers', type=int, default=0,
+                        help="Also compare the threaded loop with a multi-process pipeline of N workers")
+    parser.add_argument('--roi', action='store_true', help="Run the end-to-end stages in ROI mode")
+    parser.add_argument('--rules', type=int, default=5000, help="Distraction rules for keyword_match")
+    parser.add_argument('--report-events', type=int, default=100000)
+    parser.add_argument('--report-iterations', type=int, default=5)
+    parser.add_argument('--clip', help="Recorded clip for the end-to-end stage (default: generated)")
+    parser.add_argument('--model', default=Config.MODEL_NAME)
+    parser.add_argument('--backend', default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--skip-yolo', action='store_true', help="Skip the stages that need the model")
+    parser.add_argument('--output', help="Write JSON results here (default: stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="Fail if slower than this earlier JSON result")
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    config = Config()
+    config.MODEL_NAME = args.model
+    config.INFERENCE_BACKEND = args.backend
+    config.HEADLESS = True
+    config.ROI_ENABLED = args.roi
+
+    frames = make_frames(args.width, args.height, args.frames)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        stages = bench_stages(config, frames, args, tmpdir)
+        if not args.skip_yolo:
+            stages["end_to_end"] = bench_end_to_end(config, frames, args, tmpdir)
+        if not args.skip_yolo and args.pipeline_workers > 0:
+            stages.update(bench_pipeline(config, frames, args, tmpdir))
+
+    result = {
+        "schema": SCHEMA_VERSION,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {
+            "resolution": [args.width, args.height],
+            "model": args.model,
+            "backend": args.backend,
+            "imgsz": config.IMGSZ,
+            "motion_width": config.MOTION_WIDTH,
+            "inference_policy": config.INFERENCE_POLICY,
+            "roi": config.ROI_ENABLED,
+            "clip": os.path.basename(args.clip) if args.clip else "synthetic",
+        },
+        "max_rss_mb": max_rss_mb(),
+        "stages": stages,
+    }
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, stage in stages.items():
+        lat = stage["latency_ms"]
+        print(f"{name:<20} p50 {lat['p50']:9.3f} ms  p95 {lat['p95']:9.3f} ms  "
+              f"{stage['throughput_per_s']:10.1f}/s", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
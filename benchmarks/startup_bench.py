@@ -0,0 +1,142 @@
+# Startup benchmark: how long until the banner is up and until the first
+# frame gets a real inference.
+#
+#   python benchmarks/startup_bench.py --output startup.json
+#   python benchmarks/startup_bench.py --compare baseline.json --tolerance 0.15
+#
+# Each run is a fresh interpreter (module caches and the model aren't shared
+# between runs, the OS file cache is). The child reports wall-clock marks
+# which are measured against the moment the parent launched it:
+#
+#   import            focus_frame imported
+#   banner            engine built and banner printed (hotkeys live)
+#   model_ready       background model load and warm-up finished
+#   first_inference   first frame analyzed by the model
+
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from focus_frame import Config
+from pipeline_bench import percentile, environment
+
+SCHEMA_VERSION = 1
+MARKS = ("import", "banner", "model_ready", "first_inference")
+
+CHILD = r"""
+import os, sys, json, time
+mark = lambda name: print("MARK " + json.dumps([name, time.time()]), flush=True)
+sys.path.insert(0, {root!r})
+import numpy as np
+import focus_frame
+mark("import")
+config = focus_frame.Config()
+config.MODEL_NAME = {model!r}
+config.INFERENCE_BACKEND = {backend!r}
+config.HEADLESS = True
+config.HISTORY_DB = None
+app = focus_frame.FocusFrameEngine(config)
+app.print_banner()
+mark("banner")
+app.wait_for_model()
+mark("model_ready")
+frame = np.zeros((480, 640, 3), dtype=np.uint8)
+app.yolo_detector.analyze(frame)
+mark("first_inference")
+"""
+
+
+def run_once(args):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = CHILD.format(root=root, model=args.model, backend=args.backend)
+    started = time.time()
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{proc.stderr}")
+    marks = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("MARK "):
+            name, t = json.loads(line[5:])
+            marks[name] = t - started
+    return marks
+
+
+def compare(current, baseline, tolerance):
+    regressions = []
+    for name, stage in current["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if base is None:
+            continue
+        for metric in ("p50", "p95"):
+            old, new = base["latency_ms"][metric], stage["latency_ms"][metric]
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {old:.1f} -> {new:.1f} ms (+{100 * (new / old - 1):.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FocusFrame startup benchmark")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--model', default=Config.MODEL_NAME)
+    parser.add_argument('--backend', default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--output', help="Write JSON results here (default: stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="Fail if slower than this earlier JSON result")
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    # One untimed run so the first timed one doesn't pay for exports / downloads
+    run_once(args)
+    runs = [run_once(args) for _ in range(args.runs)]
+
+    stages = {}
+    for name in MARKS:
+        timings = sorted(r[name] for r in runs)
+        stages[f"time_to_{name}"] = {
+            "runs": len(timings),
+            "latency_ms": {
+                "mean": 1000 * sum(timings) / len(timings),
+                "p50": 1000 * percentile(timings, 0.50),
+                "p95": 1000 * percentile(timings, 0.95),
+                "max": 1000 * timings[-1],
+            },
+        }
+
+    result = {
+        "schema": SCHEMA_VERSION,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "parameters": {
+            "model": args.model,
+            "backend": args.backend,
+        },
+        "stages": stages,
+    }
+
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for name, stage in stages.items():
+        lat = stage["latency_ms"]
+        print(f"{name:<26} p50 {lat['p50']:9.1f} ms  p95 {lat['p95']:9.1f} ms", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,21 @@ import threading
 import datetime
 import os
 import argparse
-import tkinter as tk
-from tkinter import ttk
-import pygetwindow as gw
-from pynput import keyboard
+import copy
+import html
+import json
+import queue
+import shutil
+import socket
+import sqlite3
+import statistics
+import tempfile
+import importlib.util
+import multiprocessing
+import numpy as np
 import webbrowser
-from ultralytics import YOLO
+from collections import deque
+from multiprocessing import shared_memory, resource_tracker
 
 
 # CONFIGURATION
@@ -20,6 +29,29 @@ class Config:
     MODEL_NAME = 'yolov8n.pt'
     CONF_THRESHOLD = 0.4
     
+    # Inference backend ("auto", "pytorch", "onnx", "openvino")
+    INFERENCE_BACKEND = "pytorch"
+    MODEL_CACHE_DIR = "models"
+    IMGSZ = 640
+    INT8 = False
+    INT8_CALIBRATION_DATA = "coco8.yaml"
+    BACKEND_WARMUP_RUNS = 5
+    
+    # Shared inference service ("serve" subcommand). INFERENCE_SERVER is the
+    # socket a client connects to instead of loading its own model (None = off)
+    INFERENCE_SERVER = None
+    INFERENCE_SOCKET = os.path.join(tempfile.gettempdir(), "focusframe-inference.sock")
+    INFERENCE_MAX_BATCH = 8
+    INFERENCE_MAX_LATENCY_MS = 15.0
+    INFERENCE_SERVER_TIMEOUT = 10.0
+    
+    # Region-of-interest inference around the last person box
+    ROI_ENABLED = False
+    ROI_IMGSZ = 320
+    ROI_EXPAND = 0.5
+    ROI_MIN_SIZE = 160
+    ROI_FULL_FRAME_INTERVAL = 2.0
+    
     # Presence detection
     PRESENCE_SCORE_MAX = 5
     PRESENCE_THRESHOLD = 2
@@ -27,8 +59,70 @@ class Config:
     SCORE_DECREMENT = 1
     DECREMENT_INTERVAL = 0.25
     MOTION_PIXEL_THRESHOLD = 1500
+    MOTION_WIDTH = 320
+    MOTION_MODE = "diff"
     ABSENCE_TIME = 5.0
     
+    # Inference scheduling ("always" or "motion")
+    INFERENCE_POLICY = "motion"
+    KEEPALIVE_FRAMES = 15
+    KEEPALIVE_MS = 1000
+    PHONE_RETRIGGER = True
+    
+    # Reuse detections for near-identical frames
+    RESULT_CACHE_ENABLED = False
+    RESULT_CACHE_SIZE = 8
+    RESULT_CACHE_MAX_DIFF = 6
+    RESULT_CACHE_MAX_AGE = 5.0
+    
+    # Optical-flow tracking between inferences
+    TRACKER_ENABLED = True
+    TRACKER_SCALE = 0.5
+    TRACKER_HALF_LIFE = 2.0
+    TRACKER_MIN_CONFIDENCE = 0.25
+    
+    # Adaptive frame rate: analysis FPS per state, capped by per-frame CPU
+    # cost (in cores) and scaled down above the system load threshold
+    GOVERNOR_ENABLED = False
+    FPS_PRESENT = 10.0
+    FPS_PHONE = 15.0
+    FPS_AWAY = 1.0
+    FPS_BREAK = 1.0
+    FPS_MIN = 0.5
+    FPS_MAX = 30.0
+    GOVERNOR_CPU_BUDGET = 0.5
+    GOVERNOR_LOAD_HIGH = 0.85
+    
+    # Preview window
+    HEADLESS = False
+    PREVIEW_FPS = 5
+    
+    # Offline replay (TRACE_DIR: also record presence traces for the tuner)
+    REPLAY_FPS = 30.0
+    REPLAY_OUTPUT_DIR = "replay_reports"
+    TRACE_DIR = None
+    
+    # Multi-source monitoring
+    SOURCES_OUTPUT_DIR = "source_reports"
+    
+    # Metrics export (off unless a port or file is set)
+    METRICS_PORT = None
+    METRICS_FILE = None
+    METRICS_INTERVAL = 10.0
+    
+    # Capture
+    CAMERA_INDEX = 0
+    CAPTURE_BUFFER_SIZE = 1
+    CAPTURE_READ_TIMEOUT = 2.0
+    CAPTURE_MAX_STALLS = 5
+    CAMERA_IDLE_TIMEOUT = 300.0
+    CAMERA_PREOPEN = False
+    
+    # Multi-process pipeline (0 workers = threaded loop in one process)
+    PIPELINE_WORKERS = 0
+    PIPELINE_SLOTS = 0
+    PIPELINE_START_TIMEOUT = 120.0
+    
     # Detection classes
     CLASS_PERSON = 0
     CLASS_PHONE = 67
@@ -38,41 +132,613 @@ class Config:
         "steam", "game", "netflix", "youtube", "facebook", "twitter",
         "instagram", "tiktok", "twitch", "discord", "hulu", "prime video"
     ]
+    DISTRACTION_RULES_FILE = None
+    WINDOW_POLL_INTERVAL = 0.5
+    
+    # Event log
+    SESSION_DIR = "sessions"
+    LOG_TAIL_SIZE = 500
+    LOG_FSYNC_INTERVAL = 1.0
+    
+    # Phone / app distractions are logged as intervals: each sighting extends
+    # the open interval of its kind, which closes after this many seconds
+    # without one
+    PHONE_EVENT_GAP = 3.0
+    APP_EVENT_GAP = 2.0
+    
+    # Evidence clips around phone / away events, linked from the report
+    CLIPS_ENABLED = False
+    CLIP_DIR = "sessions/clips"
+    CLIP_PRE_SECONDS = 5.0
+    CLIP_POST_SECONDS = 5.0
+    CLIP_FPS = 5.0
+    CLIP_WIDTH = 320
+    CLIP_QUOTA_MB = 200
+    
+    # Session history (None = off)
+    HISTORY_DB = "sessions/history.db"
+    HISTORY_REPORT_DAYS = 14
+
+
+# CAPTURE
+
+class RateCounter:
+    def __init__(self, window=60):
+        self.times = deque(maxlen=window)
+        self.count = 0
+    
+    def tick(self, now=None):
+        self.times.append(now if now is not None else time.time())
+        self.count += 1
+    
+    def rate(self):
+        if len(self.times) < 2:
+            return 0.0
+        span = self.times[-1] - self.times[0]
+        return (len(self.times) - 1) / span if span > 0 else 0.0
+
+
+# Reads frames on its own thread so slow analysis never backs up the camera.
+# read() always hands out the newest frame; older ones are dropped and counted.
+# A read that times out (a stall) is retried, and a device that stopped
+# delivering is reopened; read() only fails after max_stalls in a row.
+# set_rate() limits how often a frame is decoded; the frames in between are
+# only grabbed, and while suspended the grabs are paced at that rate as well.
+class FrameGrabber:
+    # Half a frame at 30 FPS, so a 10 FPS limit lands on every third frame
+    # instead of every fourth
+    RATE_SLACK = 0.015
+    # A grab that returns faster than this came out of the driver queue
+    # instead of waiting for the sensor
+    QUEUED_GRAB = 0.005
+    MAX_FLUSH = 8
+    
+    def __init__(self, source=0, buffer_size=1, read_timeout=2.0, max_stalls=5):
+        self.source = source
+        self.buffer = deque(maxlen=max(1, buffer_size))
+        self.read_timeout = read_timeout
+        self.max_stalls = max(1, max_stalls)
+        self.cond = threading.Condition()
+        self.wake = threading.Event()
+        self.cap = None
+        self.thread = None
+        self.running = False
+        self.stopped = False
+        self.suspended = False
+        self.interval = 0.0
+        self.last_decode = 0.0
+        self.flush = False
+        self.last_frame_time = time.time()
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.capture_rate = RateCounter()
+        self.analysis_rate = RateCounter()
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.stalls = 0
+        self.reopens = 0
+    
+    def start(self):
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+        
+        # Keep the driver-side queue short so we don't read old frames from it
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        self.running = True
+        self.stopped = False
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.thread.start()
+        return True
+    
+    def _capture_loop(self):
+        while self.running:
+            if self.suspended and self.interval:
+                # Paced grabs leave stale frames in the driver queue, dropped
+                # on resume
+                self.wake.wait(self.interval)
+                self.wake.clear()
+                self.flush = True
+                if not self.suspended or not self.running:
+                    continue
+            
+            if self.flush and not self.suspended:
+                self.flush = False
+                ret, frame = self.drain(self.cap), None
+            else:
+                ret, frame = self.cap.grab(), None
+            now = time.time()
+            if ret:
+                if self.suspended or now < self.last_decode + self.interval - self.RATE_SLACK:
+                    # Keep the device streaming (exposure stays settled and the
+                    # driver queue stays fresh) but skip decoding
+                    continue
+                ret, frame = self.cap.retrieve()
+                self.last_decode = now
+            
+            with self.cond:
+                if not ret:
+                    self.running = False
+                    self.cond.notify_all()
+                    break
+                
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.frames_dropped += 1
+                self.buffer.append((frame, now))
+                self.frames_read += 1
+                self.capture_rate.tick(now)
+                self.cond.notify_all()
+    
+    # Grabs until one has to wait for the sensor (or MAX_FLUSH of them), so
+    # every frame queued in the driver is dropped and the last grab is fresh.
+    # False if the device failed.
+    @classmethod
+    def drain(cls, cap):
+        for _ in range(cls.MAX_FLUSH):
+            started = time.time()
+            if not cap.grab():
+                return False
+            if time.time() - started >= cls.QUEUED_GRAB:
+                break
+        return True
+    
+    def read(self):
+        for _ in range(self.max_stalls):
+            with self.cond:
+                if not self.buffer and self.running:
+                    self.cond.wait(self.read_timeout + self.interval)
+                
+                if self.buffer:
+                    # Newest frame wins, everything older is stale
+                    frame, frame_time = self.buffer.pop()
+                    self.frames_dropped += len(self.buffer)
+                    self.buffer.clear()
+                    break
+                running = self.running
+            
+            if self.stopped:
+                return False, None
+            self.stalls += 1
+            if not running:
+                self._reopen()
+        else:
+            return False, None
+        
+        self.last_frame_time = frame_time
+        self.analysis_rate.tick()
+        return True, frame
+    
+    # The capture thread ended on a failed grab: start over on a fresh handle
+    def _reopen(self):
+        if self.thread is not None:
+            self.thread.join(timeout=self.read_timeout)
+            self.thread = None
+        if self.cap is not None:
+            self.cap.release()
+        self.reopens += 1
+        if not self.start():
+            # Device not back yet, give it a moment before the next attempt
+            time.sleep(self.read_timeout)
+    
+    def suspend(self):
+        self.suspended = True
+        with self.cond:
+            self.buffer.clear()
+    
+    def resume(self):
+        with self.cond:
+            self.buffer.clear()
+        self.reset_stats()
+        self.last_decode = 0.0
+        self.suspended = False
+        self.wake.set()
+        return self.running
+    
+    # Max decoded frames per second (None / 0 = every frame). A higher rate
+    # takes effect on the next frame.
+    def set_rate(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+    
+    def stop(self):
+        self.running = False
+        self.stopped = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.read_timeout)
+            self.thread = None
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        with self.cond:
+            self.buffer.clear()
+    
+    def stats(self):
+        return {
+            "capture_fps": self.capture_rate.rate(),
+            "analysis_fps": self.analysis_rate.rate(),
+            "frames_read": self.frames_read,
+            "frames_analyzed": self.analysis_rate.count,
+            "frames_dropped": self.frames_dropped,
+        }
+    
+    def summary(self):
+        s = self.stats()
+        stalls = f", {self.stalls} stalls / {self.reopens} reopens" if self.stalls else ""
+        return (f"Capture {s['capture_fps']:.1f} FPS / Analysis {s['analysis_fps']:.1f} FPS, "
+                f"{s['frames_dropped']}/{s['frames_read']} frames dropped{stalls}")
+
+
+# Owns the camera for the life of the process. release() doesn't close the
+# device, it only suspends the grabber, so the next work period or session
+# gets frames immediately instead of waiting on device startup and
+# auto-exposure. The device is closed for real after idle_timeout seconds
+# without an acquire() (None = keep it open). factory builds the grabber
+# (FrameGrabber, or ProcessPipeline in multi-process mode).
+class CameraManager:
+    def __init__(self, factory, idle_timeout=300.0):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.grabber = None
+        self.idle_timer = None
+        self.lock = threading.Lock()
+        self.opens = 0
+        self.resumes = 0
+    
+    def acquire(self):
+        with self.lock:
+            self._cancel_timer()
+            if self.grabber is not None:
+                if self.grabber.resume():
+                    self.resumes += 1
+                    return self.grabber
+                # Device went away while suspended
+                self.grabber.stop()
+                self.grabber = None
+            
+            grabber = self.factory()
+            if not grabber.start():
+                return None
+            self.grabber = grabber
+            self.opens += 1
+            return grabber
+    
+    # Open the device ahead of the first session
+    def warm(self):
+        grabber = self.acquire()
+        if grabber is not None:
+            self.suspend()
+        return grabber is not None
+    
+    def suspend(self):
+        with self.lock:
+            if self.grabber is not None:
+                self.grabber.suspend()
+    
+    def release(self):
+        self.suspend()
+        with self.lock:
+            self._cancel_timer()
+            if self.grabber is not None and self.idle_timeout is not None:
+                self.idle_timer = threading.Timer(self.idle_timeout, self._idle_close)
+                self.idle_timer.daemon = True
+                self.idle_timer.start()
+    
+    def _cancel_timer(self):
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+    
+    def _idle_close(self):
+        with self.lock:
+            if self.grabber is not None and self.grabber.suspended:
+                self.grabber.stop()
+                self.grabber = None
+            self.idle_timer = None
+    
+    def close(self):
+        with self.lock:
+            self._cancel_timer()
+            if self.grabber is not None:
+                self.grabber.stop()
+                self.grabber = None
+    
+    def summary(self):
+        return f"{self.opens} device opens / {self.resumes} warm resumes"
+
+
+# Picks the analysis rate after every frame. The state sets the target: a
+# phone seen in the last PHONE_HOLD seconds > present > away, and any motion
+# while away goes straight back to the present rate. The target is capped so
+# the measured CPU cost of a frame (all threads of the process) fits in
+# cpu_budget cores, scaled down while the whole system is above load_high, and
+# clamped to [min_fps, max_fps]. break_fps applies while the camera is
+# suspended. CPU seconds are counted from reset() for the session stats.
+class FrameRateGovernor:
+    PHONE_HOLD = 10.0
+    WAKE_HOLD = 2.0
+    LOAD_INTERVAL = 2.0
+    
+    def __init__(self, present_fps=10.0, away_fps=1.0, phone_fps=15.0, break_fps=1.0,
+                 min_fps=0.5, max_fps=30.0, cpu_budget=0.5, load_high=0.85):
+        self.present_fps = present_fps
+        self.away_fps = away_fps
+        self.phone_fps = phone_fps
+        self.break_fps = break_fps
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.cpu_budget = cpu_budget
+        self.load_high = load_high
+        self.load = None
+        self.load_checked = 0.0
+        self.reset()
+    
+    def reset(self):
+        self.fps = self.present_fps
+        self.state = "present"
+        self.cost = 0.0
+        self.frames = 0
+        self.phone_until = 0.0
+        self.motion_until = 0.0
+        self.last_time = None
+        self.state_seconds = {"present": 0.0, "away": 0.0, "phone": 0.0}
+        self.cpu_start = self.last_cpu = time.process_time()
+        self.wall_start = time.time()
+    
+    def update(self, motion, away, phone, current_time):
+        # Per-frame CPU cost, smoothed. The first frame also paid for opening
+        # the camera, so it only sets the baseline.
+        cpu = time.process_time()
+        if self.frames > 0:
+            cost = cpu - self.last_cpu
+            self.cost = cost if self.frames == 1 else 0.8 * self.cost + 0.2 * cost
+        self.last_cpu = cpu
+        self.frames += 1
+        if self.last_time is not None:
+            self.state_seconds[self.state] += current_time - self.last_time
+        self.last_time = current_time
+        
+        if phone:
+            self.phone_until = current_time + self.PHONE_HOLD
+        if motion:
+            self.motion_until = current_time + self.WAKE_HOLD
+        if current_time < self.phone_until:
+            self.state, fps = "phone", self.phone_fps
+        elif away and current_time >= self.motion_until:
+            self.state, fps = "away", self.away_fps
+        else:
+            self.state, fps = "present", self.present_fps
+        
+        if self.cost > 0:
+            fps = min(fps, self.cpu_budget / self.cost)
+        load = self._system_load()
+        if load is not None and load > self.load_high:
+            fps *= self.load_high / load
+        self.fps = min(self.max_fps, max(self.min_fps, fps))
+        return self.fps
+    
+    # Busy fraction of all cores: psutil if installed, else the 1-minute load
+    # average (not available on Windows)
+    def _system_load(self):
+        now = time.time()
+        if now - self.load_checked < self.LOAD_INTERVAL:
+            return self.load
+        self.load_checked = now
+        try:
+            import psutil
+            self.load = psutil.cpu_percent() / 100.0
+        except ImportError:
+            try:
+                self.load = os.getloadavg()[0] / (os.cpu_count() or 1)
+            except (AttributeError, OSError):
+                self.load = None
+        return self.load
+    
+    def cpu_seconds(self):
+        return time.process_time() - self.cpu_start
+    
+    def summary(self):
+        wall = time.time() - self.wall_start
+        cpu = self.cpu_seconds()
+        tracked = sum(self.state_seconds.values())
+        shares = " / ".join(
+            f"{state} {100.0 * seconds / tracked:.0f}%" for state, seconds in self.state_seconds.items()
+        ) if tracked > 0 else "no frames"
+        avg_fps = self.frames / wall if wall > 0 else 0.0
+        core_pct = 100.0 * cpu / wall if wall > 0 else 0.0
+        return (f"{avg_fps:.1f} FPS average ({shares}), {cpu:.1f} CPU-seconds over {wall:.0f}s "
+                f"({core_pct:.1f}% of a core, {1000 * self.cost:.0f} ms per frame)")
+
+
+# Plays back a recorded video (or a directory of frame images) with the same
+# interface as FrameGrabber. Every frame is delivered, as fast as it can be
+# consumed, and last_frame_time is a virtual clock: start_epoch plus the frame's
+# presentation timestamp.
+class ReplaySource:
+    IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+    
+    def __init__(self, path, fps=30.0, start_epoch=None):
+        self.path = path
+        self.fps = fps
+        self.start_epoch = start_epoch
+        self.cap = None
+        self.images = None
+        self.index = 0
+        self.pts = 0.0
+        self.last_frame_time = self.start_epoch
+        self.frames_read = 0
+        self.started_at = None
+    
+    def start(self):
+        if os.path.isdir(self.path):
+            self.images = sorted(
+                os.path.join(self.path, name) for name in os.listdir(self.path)
+                if name.lower().endswith(self.IMAGE_EXTENSIONS)
+            )
+            opened = bool(self.images)
+        else:
+            self.cap = cv2.VideoCapture(self.path)
+            opened = self.cap.isOpened()
+            if opened:
+                self.fps = self.cap.get(cv2.CAP_PROP_FPS) or self.fps
+        
+        # Without a start time, the recording is taken to have ended when the
+        # file was last written
+        if opened and self.start_epoch is None:
+            frames = len(self.images) if self.images is not None else max(0.0, self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.start_epoch = os.path.getmtime(self.path) - frames / self.fps
+        self.last_frame_time = self.start_epoch
+        self.started_at = time.time()
+        return opened
+    
+    def read(self):
+        if self.images is not None:
+            if self.index >= len(self.images):
+                return False, None
+            frame = cv2.imread(self.images[self.index])
+            pts = self.index / self.fps
+        else:
+            ret, frame = self.cap.read()
+            if not ret:
+                return False, None
+            pts = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            # Some containers don't report timestamps, fall back to the frame rate
+            if self.index > 0 and pts <= self.pts:
+                pts = self.index / self.fps
+        
+        self.index += 1
+        self.frames_read += 1
+        self.pts = pts
+        self.last_frame_time = self.start_epoch + pts
+        return frame is not None, frame
+    
+    def stop(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+    
+    def stats(self):
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            "frames_read": self.frames_read,
+            "video_seconds": self.pts,
+            "wall_seconds": elapsed,
+            "analysis_fps": self.frames_read / elapsed if elapsed > 0 else 0.0,
+        }
+    
+    def summary(self):
+        s = self.stats()
+        speed = s["video_seconds"] / s["wall_seconds"] if s["wall_seconds"] > 0 else 0.0
+        return (f"Replayed {s['frames_read']} frames ({s['video_seconds']:.1f}s of video) "
+                f"in {s['wall_seconds']:.1f}s, {s['analysis_fps']:.1f} FPS ({speed:.1f}x real time)")
 
 
 # DETECTION & MONITORING
 
+# Frame-differencing (or background-subtraction) motion check on a downscaled
+# copy of the frame. All intermediate images live in buffers allocated once per
+# resolution and written through OpenCV's dst= outputs. MOTION_PIXEL_THRESHOLD
+# is given in full-frame pixels and scaled to the working resolution.
+class MotionDetector:
+    MODES = ("diff", "mog2", "knn")
+    
+    def __init__(self, pixel_threshold, width=320, mode="diff", diff_threshold=25):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown motion mode: {mode}")
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.mode = mode
+        self.diff_threshold = diff_threshold
+        self.frame_shape = None
+        self.last_motion_pixels = 0
+    
+    def reset(self):
+        self.frame_shape = None
+        self.last_motion_pixels = 0
+    
+    def _allocate(self, frame_shape):
+        height, width = frame_shape[:2]
+        if self.width and width > self.width:
+            self.size = (self.width, max(1, round(height * self.width / width)))
+        else:
+            self.size = (width, height)
+        
+        w, h = self.size
+        self.small = np.empty((h, w, 3), dtype=np.uint8) if self.size != (width, height) else None
+        self.gray = np.empty((h, w), dtype=np.uint8)
+        self.prev = np.empty((h, w), dtype=np.uint8)
+        self.diff = np.empty((h, w), dtype=np.uint8)
+        self.mask = np.empty((h, w), dtype=np.uint8)
+        self.pixel_scale = (width * height) / (w * h)
+        self.threshold = self.pixel_threshold / self.pixel_scale
+        self.primed = False
+        
+        if self.mode == "mog2":
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        elif self.mode == "knn":
+            self.subtractor = cv2.createBackgroundSubtractorKNN(detectShadows=False)
+        
+        self.frame_shape = frame_shape
+    
+    def detect(self, frame):
+        if frame.shape != self.frame_shape:
+            self._allocate(frame.shape)
+        
+        if self.small is not None:
+            # INTER_AREA is an order of magnitude slower at 1080p and motion
+            # counting doesn't need its anti-aliasing
+            cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_LINEAR)
+            cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        else:
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        
+        if self.mode == "diff":
+            if not self.primed:
+                self.gray, self.prev = self.prev, self.gray
+                self.primed = True
+                return False
+            cv2.absdiff(self.gray, self.prev, dst=self.diff)
+            cv2.threshold(self.diff, self.diff_threshold, 255, cv2.THRESH_BINARY, dst=self.mask)
+            # Current frame becomes the reference, old reference is reused next time
+            self.gray, self.prev = self.prev, self.gray
+        else:
+            self.subtractor.apply(self.gray, self.mask)
+        
+        self.last_motion_pixels = cv2.countNonZero(self.mask)
+        return self.last_motion_pixels > self.threshold
+    
+    # Last count in full-resolution pixels, comparable with pixel_threshold
+    def full_frame_pixels(self):
+        return self.last_motion_pixels * self.pixel_scale if self.frame_shape is not None else 0.0
+
+
 class PresenceDetector:    
     def __init__(self, config):
         self.config = config
         self.score = config.PRESENCE_SCORE_MAX
-        self.prev_gray = None
+        self.motion = MotionDetector(
+            config.MOTION_PIXEL_THRESHOLD,
+            config.MOTION_WIDTH,
+            config.MOTION_MODE
+        )
         self.last_decrement = time.time()
         self.last_seen = time.time()
         self.is_away = False
         
-    def reset(self):
+    def reset(self, current_time=None):
+        if current_time is None:
+            current_time = time.time()
         self.score = self.config.PRESENCE_SCORE_MAX
-        self.prev_gray = None
-        self.last_decrement = time.time()
-        self.last_seen = time.time()
+        self.motion.reset()
+        self.last_decrement = current_time
+        self.last_seen = current_time
         self.is_away = False
     
     def detect_motion(self, frame):
-        try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            motion_detected = False
-            
-            if self.prev_gray is not None:
-                diff = cv2.absdiff(gray, self.prev_gray)
-                _, th = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-                motion_pixels = cv2.countNonZero(th)
-                motion_detected = motion_pixels > self.config.MOTION_PIXEL_THRESHOLD
-            
-            self.prev_gray = gray
-            return motion_detected
-        except Exception:
-            return False
+        return self.motion.detect(frame)
     
     def update_score(self, person_detected, motion_detected, current_time):
         prev_score = self.score
@@ -81,10 +747,15 @@ class PresenceDetector:
             self.score = min(self.score + self.config.SCORE_INCREMENT, 
                            self.config.PRESENCE_SCORE_MAX)
             self.last_seen = current_time
+            self.last_decrement = current_time
         else:
-            if current_time - self.last_decrement >= self.config.DECREMENT_INTERVAL:
-                self.score = max(self.score - self.config.SCORE_DECREMENT, 0)
-                self.last_decrement = current_time
+            # One decrement per interval without activity, however many frames
+            # arrived in it, so the score drains at the same speed at 1 FPS as
+            # at 30
+            steps = int((current_time - self.last_decrement) / self.config.DECREMENT_INTERVAL)
+            if steps > 0:
+                self.score = max(self.score - steps * self.config.SCORE_DECREMENT, 0)
+                self.last_decrement += steps * self.config.DECREMENT_INTERVAL
         
         return prev_score
     
@@ -102,53 +773,839 @@ class PresenceDetector:
         return None
 
 
+# Exports the PyTorch weights to ONNX / OpenVINO once and keeps the result on
+# disk, keyed by input size and precision, so later starts just load it.
+class ModelCache:
+    BACKENDS = ("pytorch", "onnx", "openvino")
+    
+    def __init__(self, model_path, cache_dir, int8=False, calibration_data=None):
+        self.model_path = model_path
+        self.cache_dir = cache_dir
+        self.int8 = int8
+        self.calibration_data = calibration_data
+    
+    @staticmethod
+    def available_backends():
+        backends = ["pytorch"]
+        if importlib.util.find_spec("onnxruntime") is not None:
+            backends.append("onnx")
+        if importlib.util.find_spec("openvino") is not None:
+            backends.append("openvino")
+        return backends
+    
+    def path_for(self, backend, imgsz):
+        if backend == "pytorch":
+            return self.model_path
+        
+        stem = os.path.splitext(os.path.basename(self.model_path))[0]
+        tag = f"{stem}_{imgsz}" + ("_int8" if self.int8 else "")
+        if backend == "onnx":
+            return os.path.join(self.cache_dir, f"{tag}.onnx")
+        if backend == "openvino":
+            # Ultralytics recognizes OpenVINO models by this directory suffix
+            return os.path.join(self.cache_dir, f"{tag}_openvino_model")
+        raise ValueError(f"Unknown inference backend: {backend}")
+    
+    def ensure(self, backend, imgsz):
+        target = self.path_for(backend, imgsz)
+        if backend == "pytorch" or os.path.exists(target):
+            return target
+        
+        from ultralytics import YOLO
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        print(f">>> {Config.APP_NAME}: EXPORTING MODEL FOR {backend.upper()} (one-time)...")
+        model = YOLO(self.model_path)
+        
+        if backend == "onnx":
+            exported = model.export(format="onnx", imgsz=imgsz)
+            if self.int8:
+                self._quantize_onnx(exported, target)
+                os.remove(exported)
+            else:
+                shutil.move(exported, target)
+        else:
+            exported = model.export(format="openvino", imgsz=imgsz, int8=self.int8,
+                                    data=self.calibration_data)
+            shutil.move(exported, target)
+        
+        return target
+    
+    @staticmethod
+    def _quantize_onnx(source, target):
+        import onnx
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        
+        quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+        
+        # Keep the class names / stride metadata Ultralytics reads back
+        original = onnx.load(source)
+        quantized = onnx.load(target)
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(original.metadata_props)
+        onnx.save(quantized, target)
+
+
+# Remembers where the person was and hands out an expanded crop around them,
+# so most inferences only look at that region. A full-frame pass is forced on
+# a timer and whenever the person box is lost.
+class PersonROI:
+    def __init__(self, expand=0.5, min_size=160, full_frame_interval=2.0, max_coverage=0.8):
+        self.expand = expand
+        self.min_size = min_size
+        self.full_frame_interval = full_frame_interval
+        self.max_coverage = max_coverage
+        self.reset()
+    
+    # None when ROI mode is off
+    @classmethod
+    def from_config(cls, config):
+        if not config.ROI_ENABLED:
+            return None
+        return cls(config.ROI_EXPAND, config.ROI_MIN_SIZE, config.ROI_FULL_FRAME_INTERVAL)
+    
+    def reset(self):
+        self.box = None
+        self.last_full_frame = 0
+    
+    def region(self, frame_shape, current_time):
+        if self.box is None or current_time - self.last_full_frame >= self.full_frame_interval:
+            return None
+        
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = self.box
+        pad_x = max((x2 - x1) * self.expand, (self.min_size - (x2 - x1)) / 2)
+        pad_y = max((y2 - y1) * self.expand, (self.min_size - (y2 - y1)) / 2)
+        x1 = int(max(0, x1 - pad_x))
+        y1 = int(max(0, y1 - pad_y))
+        x2 = int(min(width, x2 + pad_x))
+        y2 = int(min(height, y2 + pad_y))
+        
+        # Not worth cropping if the region is most of the frame anyway
+        if (x2 - x1) * (y2 - y1) >= self.max_coverage * width * height:
+            return None
+        return x1, y1, x2, y2
+    
+    def update(self, person_box, full_frame, current_time):
+        if full_frame:
+            self.last_full_frame = current_time
+        self.box = person_box
+
+
+# load=False leaves out the model: the pipeline coordinator only turns the
+# boxes its workers computed into results (see from_boxes).
 class YOLODetector:
-    def __init__(self, model_path, target_classes, confidence_threshold):
-        print(f">>> {Config.APP_NAME}: LOADING AI MODEL...")
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, target_classes, confidence_threshold,
+                 backend="pytorch", imgsz=640, int8=False, cache_dir="models",
+                 calibration_data=None, warmup_runs=5, roi=None, roi_imgsz=320,
+                 server=None, server_timeout=10.0, load=True):
         self.target_classes = target_classes
         self.confidence_threshold = confidence_threshold
+        self.imgsz = imgsz
+        self.warmup_runs = warmup_runs
+        self.cache = ModelCache(model_path, cache_dir, int8, calibration_data)
+        
+        # ROI mode
+        self.roi = roi
+        self.roi_imgsz = roi_imgsz
+        self.roi_passes = 0
+        self.full_passes = 0
+        self.last_boxes = {}
+        self.local_backend = backend
+        
+        if not load:
+            self.backend, self.model, self.roi_model = "pipeline", None, None
+            return
+        
+        print(f">>> {Config.APP_NAME}: LOADING AI MODEL...")
+        # A running inference server stands in for the local model
+        client = None
+        if server is not None:
+            try:
+                client = InferenceClient(server, server_timeout)
+            except OSError as e:
+                print(f">>> {Config.APP_NAME}: Inference server {server} not reachable ({e}), loading the model locally")
+        
+        if client is not None:
+            # The server did its own warm-up
+            self.backend, self.model = "server", client
+            self.roi_model = client if roi is not None else None
+        else:
+            self._load_local()
+        
+        print(f">>> {Config.APP_NAME}: INFERENCE BACKEND = {self.backend} (imgsz={imgsz}{', int8' if int8 else ''})")
+    
+    @classmethod
+    def from_config(cls, config, roi=None, load=True):
+        return cls(
+            config.MODEL_NAME,
+            [config.CLASS_PERSON, config.CLASS_PHONE],
+            config.CONF_THRESHOLD,
+            backend=config.INFERENCE_BACKEND,
+            imgsz=config.IMGSZ,
+            int8=config.INT8,
+            cache_dir=config.MODEL_CACHE_DIR,
+            calibration_data=config.INT8_CALIBRATION_DATA,
+            warmup_runs=config.BACKEND_WARMUP_RUNS,
+            roi=roi,
+            roi_imgsz=config.ROI_IMGSZ,
+            server=config.INFERENCE_SERVER,
+            server_timeout=config.INFERENCE_SERVER_TIMEOUT,
+            load=load
+        )
+    
+    def _load(self, backend, imgsz):
+        from ultralytics import YOLO
+        
+        path = self.cache.ensure(backend, imgsz)
+        if backend == "pytorch":
+            return YOLO(path)
+        return YOLO(path, task="detect")
+    
+    # Loads the model (and the ROI model) in this process. Pays for lazy setup
+    # (layer fusing, allocator, graph compile) now instead of on the first
+    # frame of the first session.
+    def _load_local(self):
+        if self.local_backend == "auto":
+            self.backend, self.model = self._pick_fastest_backend()
+        else:
+            self.backend, self.model = self.local_backend, self._load(self.local_backend, self.imgsz)
+            self._warmup(self.model, self.imgsz)
+        
+        self.roi_model = None
+        if self.roi is not None:
+            # Exported models have a fixed input size, PyTorch can take any
+            if self.backend == "pytorch" or self.roi_imgsz == self.imgsz:
+                self.roi_model = self.model
+            else:
+                self.roi_model = self._load(self.backend, self.roi_imgsz)
+                self._warmup(self.roi_model, self.roi_imgsz)
+    
+    # Runs call() against the current model. If that was the inference server
+    # and it's gone for good or keeps replying with errors (the client already
+    # tried to reconnect), the model is loaded here, same as when the server
+    # was never reachable, and the call is repeated on it.
+    def _with_fallback(self, call):
+        try:
+            return call()
+        except OSError as e:
+            if self.backend != "server":
+                raise
+            print(f">>> {Config.APP_NAME}: Lost the inference server ({e}), loading the model locally")
+            self.model.close()
+            self._load_local()
+            print(f">>> {Config.APP_NAME}: INFERENCE BACKEND = {self.backend} (imgsz={self.imgsz})")
+        return call()
+    
+    def _warmup(self, model, imgsz):
+        model(np.zeros((480, 640, 3), dtype=np.uint8), verbose=False, classes=self.target_classes, imgsz=imgsz)
+    
+    def _benchmark(self, model):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        timings = []
+        # First call pays for lazy setup, so it isn't timed
+        for i in range(self.warmup_runs + 1):
+            start = time.perf_counter()
+            model(frame, verbose=False, classes=self.target_classes, imgsz=self.imgsz)
+            if i > 0:
+                timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+    
+    def _pick_fastest_backend(self):
+        best = None
+        for backend in ModelCache.available_backends():
+            try:
+                model = self._load(backend, self.imgsz)
+                elapsed = self._benchmark(model)
+            except Exception as e:
+                print(f"   [{backend}] unavailable: {e}")
+                continue
+            
+            print(f"   [{backend}] {elapsed * 1000:.1f} ms/frame")
+            if best is None or elapsed < best[2]:
+                best = (backend, model, elapsed)
+        
+        if best is None:
+            raise RuntimeError("No inference backend could be loaded")
+        return best[0], best[1]
+    
+    def _predict_region(self, frame, region):
+        from ultralytics.engine.results import Results
+        
+        x1, y1, x2, y2 = region
+        crop = frame[y1:y2, x1:x2]
+        results = self._with_fallback(
+            lambda: self.roi_model(crop, verbose=False, classes=self.target_classes, imgsz=self.roi_imgsz))
+        
+        # Shift boxes back into full-frame coordinates so plotting and
+        # downstream consumers never see crop space
+        mapped = []
+        for r in results:
+            data = r.boxes.data.clone()
+            data[:, [0, 2]] += x1
+            data[:, [1, 3]] += y1
+            mapped.append(Results(frame, path=r.path, names=r.names, boxes=data, speed=r.speed))
+        return mapped
     
-    def analyze(self, frame):
-        results = self.model(frame, verbose=False, classes=self.target_classes)
-        person_detected = False
-        phone_detected = False
+    # Best box per class, as {cls_id: ((x1, y1, x2, y2), conf)}
+    def _summarize(self, results):
+        best = {}
         
         for r in results:
             for box in r.boxes:
                 cls_id = int(box.cls[0])
                 conf = float(box.conf[0])
                 
-                if conf > self.confidence_threshold:
-                    if cls_id == Config.CLASS_PERSON:
-                        person_detected = True
-                    elif cls_id == Config.CLASS_PHONE:
-                        phone_detected = True
+                if conf > self.confidence_threshold and conf > best.get(cls_id, (None, 0.0))[1]:
+                    best[cls_id] = (tuple(float(v) for v in box.xyxy[0]), conf)
+        
+        return best
+    
+    def analyze(self, frame, current_time=None):
+        if current_time is None:
+            current_time = time.time()
+        
+        region = self.roi.region(frame.shape, current_time) if self.roi is not None else None
+        
+        if region is not None:
+            results = self._predict_region(frame, region)
+            boxes = self._summarize(results)
+            self.roi_passes += 1
+            if Config.CLASS_PERSON not in boxes:
+                # Lost them inside the crop, confirm on the whole frame
+                region = None
+        
+        if region is None:
+            results = self._with_fallback(lambda: self.predict([frame], self.imgsz))
+            boxes = self._summarize(results)
+            self.full_passes += 1
+        
+        self.last_boxes = boxes
+        person_box = boxes[Config.CLASS_PERSON][0] if Config.CLASS_PERSON in boxes else None
+        if self.roi is not None:
+            self.roi.update(person_box, region is None, current_time)
+        
+        return results, Config.CLASS_PERSON in boxes, Config.CLASS_PHONE in boxes
+    
+    # A cached result stands in for analyze(): the ROI follows its person box
+    # like it would a fresh one
+    def reuse(self, boxes, current_time):
+        self.last_boxes = boxes
+        if self.roi is not None:
+            person = boxes.get(Config.CLASS_PERSON)
+            self.roi.update(person[0] if person else None, False, current_time)
+    
+    # One Results per frame from as few model calls as possible. Exported
+    # models have a fixed batch size of 1, so those still run frame by frame.
+    def predict(self, frames, imgsz, classes=None):
+        classes = self.target_classes if classes is None else classes
+        if self.backend in ("pytorch", "server"):
+            return self.model(frames, verbose=False, classes=classes, imgsz=imgsz)
+        return [r for frame in frames for r in self.model(frame, verbose=False, classes=classes, imgsz=imgsz)]
+    
+    # One model call for several frames (multi-source mode); returns analyze()'s
+    # (results, person, phone) per frame and each frame's boxes in
+    # last_batch_boxes. Always full-frame.
+    def analyze_batch(self, frames):
+        batch = self._with_fallback(lambda: self.predict(frames, self.imgsz))
+        
+        outputs = []
+        self.last_batch_boxes = []
+        for r in batch:
+            boxes = self._summarize([r])
+            self.last_batch_boxes.append(boxes)
+            outputs.append(([r], Config.CLASS_PERSON in boxes, Config.CLASS_PHONE in boxes))
+        self.full_passes += len(frames)
+        return outputs
+    
+    # Same as analyze(), for raw box data (x1, y1, x2, y2, conf, cls rows)
+    # that a pipeline worker computed on this frame, on the full frame or on
+    # its ROI crop
+    def from_boxes(self, frame, boxes, names, full_frame=True):
+        import torch
+        from ultralytics.engine.results import Results
+        
+        results = [Results(frame, path="", names=names, boxes=torch.from_numpy(boxes))]
+        self.last_boxes = self._summarize(results)
+        if full_frame:
+            self.full_passes += 1
+        else:
+            self.roi_passes += 1
+        return results, Config.CLASS_PERSON in self.last_boxes, Config.CLASS_PHONE in self.last_boxes
+    
+    def summary(self):
+        return f"{self.full_passes} full-frame / {self.roi_passes} ROI passes"
+
+
+# Carries the last detector boxes forward between inferences with sparse
+# optical flow. Each track's confidence decays over time and with the share of
+# flow points lost, so a track that isn't re-anchored by YOLO eventually stops
+# counting as a detection.
+class BoxTracker:
+    def __init__(self, scale=0.5, half_life=2.0, min_confidence=0.25, max_points=40):
+        self.scale = scale
+        self.half_life = half_life
+        self.min_confidence = min_confidence
+        self.max_points = max_points
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.reset()
+    
+    def reset(self):
+        self.tracks = {}
+        self.prev_gray = None
+        self.last_update = 0
+        self.frames_tracked = 0
+        self.tracks_lost = 0
+    
+    def _gray(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale != 1.0:
+            gray = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return gray
+    
+    def _seed_points(self, gray, box):
+        x1, y1, x2, y2 = [int(v * self.scale) for v in box]
+        mask = np.zeros_like(gray)
+        mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 255
+        return cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 5, mask=mask)
+    
+    def anchor(self, frame, boxes, current_time):
+        gray = self._gray(frame)
+        self.tracks = {}
+        for cls_id, (box, conf) in boxes.items():
+            points = self._seed_points(gray, box)
+            if points is not None and len(points) >= 3:
+                self.tracks[cls_id] = {"box": box, "conf": conf, "points": points}
+        self.prev_gray = gray
+        self.last_update = current_time
+    
+    def update(self, frame, current_time):
+        if self.prev_gray is None or not self.tracks:
+            return
+        
+        gray = self._gray(frame)
+        decay = 0.5 ** ((current_time - self.last_update) / self.half_life)
+        
+        for cls_id in list(self.tracks):
+            track = self.tracks[cls_id]
+            points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, track["points"], None, **self.lk_params)
+            good = status.reshape(-1) == 1
+            
+            if good.sum() < 3:
+                del self.tracks[cls_id]
+                self.tracks_lost += 1
+                continue
+            
+            # Shift the box by the median flow of the surviving points
+            dx, dy = (float(v) / self.scale for v in np.median(points[good] - track["points"][good], axis=0).reshape(-1))
+            x1, y1, x2, y2 = track["box"]
+            track["box"] = (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+            track["conf"] *= decay * good.sum() / len(good)
+            track["points"] = points[good].reshape(-1, 1, 2)
+            
+            if track["conf"] < self.min_confidence:
+                del self.tracks[cls_id]
+                self.tracks_lost += 1
+        
+        self.prev_gray = gray
+        self.last_update = current_time
+        self.frames_tracked += 1
+    
+    def is_tracking(self, cls_id):
+        return cls_id in self.tracks
+    
+    def summary(self):
+        return f"{self.frames_tracked} frames tracked, {self.tracks_lost} tracks lost"
+
+
+# Reuses a recent detection when the frame looks like one YOLO already saw.
+# The signature is a 16x12 grid of grayscale block means; two frames match when
+# no block differs by more than max_diff levels, so a phone showing up in one
+# corner still misses. An entry can be reused for max_age seconds after its
+# inference, and the least recently used one is evicted when the cache is full.
+class ResultCache:
+    GRID = (16, 12)
+    
+    def __init__(self, size=8, max_diff=6, max_age=5.0):
+        self.size = size
+        self.max_diff = max_diff
+        self.max_age = max_age
+        w, h = self.GRID
+        # Linear pre-shrink, then an area average over it: close to a full
+        # INTER_AREA at ~1% of the cost
+        self.coarse = np.empty((h * 8, w * 8, 3), dtype=np.uint8)
+        self.small = np.empty((h, w, 3), dtype=np.uint8)
+        self.gray = np.empty((h, w), dtype=np.uint8)
+        self.signatures = np.zeros((size, w * h), dtype=np.int16)
+        self.reset()
+    
+    def reset(self):
+        self.stored_at = np.full(self.size, -np.inf)
+        self.last_used = np.full(self.size, -np.inf)
+        self.entries = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+    
+    def signature(self, frame):
+        cv2.resize(frame, self.coarse.shape[1::-1], dst=self.coarse, interpolation=cv2.INTER_LINEAR)
+        cv2.resize(self.coarse, self.GRID, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        return self.gray.ravel().astype(np.int16)
+    
+    # (detection, boxes) of the closest live entry, or None
+    def lookup(self, signature, current_time):
+        live = current_time - self.stored_at <= self.max_age
+        if live.any():
+            diffs = np.abs(self.signatures - signature).max(axis=1)
+            diffs[~live] = 256
+            i = int(diffs.argmin())
+            if diffs[i] <= self.max_diff:
+                self.last_used[i] = current_time
+                self.hits += 1
+                return self.entries[i]
+        self.misses += 1
+        return None
+    
+    def store(self, signature, detection, boxes, current_time):
+        live = current_time - self.stored_at <= self.max_age
+        i = int(np.where(live, self.last_used, -np.inf).argmin())
+        self.signatures[i] = signature
+        self.entries[i] = (detection, boxes)
+        self.stored_at[i] = current_time
+        self.last_used[i] = current_time
+    
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Decides per frame whether YOLO needs to run. With the "motion" policy a full
+# inference happens on motion, right after a phone sighting, or when the
+# keep-alive (every N frames / X ms, whichever comes first) expires. Skipped
+# frames reuse the last detection result. The result cache only stands in for
+# runs triggered by the policy or by motion: the first run, phone re-checks
+# and keep-alives exist to get a fresh look, so they always reach the model.
+class InferenceScheduler:
+    def __init__(self, policy="motion", keepalive_frames=15, keepalive_ms=1000, phone_retrigger=True, cache=None):
+        self.policy = policy
+        self.keepalive_frames = keepalive_frames
+        self.keepalive_interval = keepalive_ms / 1000.0
+        self.phone_retrigger = phone_retrigger
+        self.cache = cache
+        self.reset()
+    
+    def reset(self):
+        if self.cache is not None:
+            self.cache.reset()
+        self.cached = 0
+        self.ran_inference = False
+        self.last_results = None
+        self.last_person = False
+        self.last_phone = False
+        self.last_run_time = 0
+        self.frames_since_run = 0
+        self.inferences = 0
+        self.skipped = 0
+    
+    CACHEABLE = ("always", "motion")
+    
+    # Why YOLO should run on this frame, or None to skip it
+    def run_reason(self, motion_detected, current_time):
+        if self.inferences == 0:
+            return "first"
+        if self.policy == "always":
+            return "always"
+        if motion_detected:
+            return "motion"
+        if self.phone_retrigger and self.last_phone:
+            return "phone"
+        if self.keepalive_frames > 0 and self.frames_since_run >= self.keepalive_frames:
+            return "keepalive"
+        if self.keepalive_interval > 0 and current_time - self.last_run_time >= self.keepalive_interval:
+            return "keepalive"
+        return None
+    
+    def should_run(self, motion_detected, current_time):
+        return self.run_reason(motion_detected, current_time) is not None
+    
+    # A cache hit counts as a fresh result (it resets the keep-alive and
+    # re-anchors the tracker) but isn't counted as an inference
+    def analyze(self, detector, frame, motion_detected, current_time):
+        reason = self.run_reason(motion_detected, current_time)
+        if reason is None:
+            return self.accept(None, current_time)
+        if self.cache is None:
+            return self.accept(detector.analyze(frame, current_time), current_time)
+        
+        signature = self.cache.signature(frame)
+        hit = self.cache.lookup(signature, current_time) if reason in self.CACHEABLE else None
+        if hit is not None:
+            detection, boxes = hit
+            detector.reuse(boxes, current_time)
+            return self.accept(detection, current_time, cached=True)
+        
+        detection = detector.analyze(frame, current_time)
+        self.cache.store(signature, detection, detector.last_boxes, current_time)
+        return self.accept(detection, current_time)
+    
+    # Records the outcome for one frame: a fresh (results, person, phone) or
+    # None when inference was skipped and the previous result carries over
+    def accept(self, detection, current_time, cached=False):
+        if detection is not None:
+            self.last_results, self.last_person, self.last_phone = detection
+            self.last_run_time = current_time
+            self.frames_since_run = 0
+            if cached:
+                self.cached += 1
+            else:
+                self.inferences += 1
+            self.ran_inference = True
+        else:
+            self.ran_inference = False
+            self.frames_since_run += 1
+            self.skipped += 1
+        
+        return self.last_results, self.last_person, self.last_phone
+    
+    def summary(self):
+        total = self.inferences + self.skipped + self.cached
+        pct = 100.0 * (self.skipped + self.cached) / total if total else 0.0
+        if self.cache is None:
+            return f"{self.inferences} inferences run, {self.skipped} skipped ({pct:.0f}%)"
+        return (f"{self.inferences} inferences run, {self.skipped} skipped, {self.cached} served from cache "
+                f"({pct:.0f}% avoided, {100.0 * self.cache.hit_rate():.0f}% cache hit rate)")
+
+
+# Aho-Corasick automaton over all rule keywords and app names. One pass over a
+# title finds every pattern in it, however many rules there are.
+class KeywordMatcher:
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = nxt
+            self.output[node].append(pattern_id)
+        
+        # Breadth-first pass to wire up failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if node else 0
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+    
+    def find(self, text):
+        found = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            if self.output[node]:
+                found.update(self.output[node])
+        return found
+
+
+# Global deny keywords plus optional allow keywords and per-app allow/deny lists.
+# An app is identified by a substring of the window title (e.g. "slack",
+# "google chrome"); "*" in an app's allow list allows that whole app. Allow
+# always wins over deny.
+#
+# Rules file (JSON):
+#   {"deny": ["reddit"], "allow": ["youtube studio"],
+#    "apps": {"slack": {"allow": ["*"]}, "google chrome": {"deny": ["news"]}}}
+class DistractionRules:
+    def __init__(self, deny=(), allow=(), apps=None):
+        self.patterns = []
+        self.pattern_ids = {}
+        self.rules = {}      # pattern id -> [(allow, app pattern id or None)]
+        self.allowed_apps = set()
         
-        return results, person_detected, phone_detected
+        for keyword in deny:
+            self._add(keyword, False, None)
+        for keyword in allow:
+            self._add(keyword, True, None)
+        for app, lists in (apps or {}).items():
+            app_id = self._pattern(app)
+            for keyword in lists.get("allow", ()):
+                if keyword == "*":
+                    self.allowed_apps.add(app_id)
+                else:
+                    self._add(keyword, True, app_id)
+            for keyword in lists.get("deny", ()):
+                self._add(keyword, False, app_id)
+        
+        self.matcher = KeywordMatcher(self.patterns)
+    
+    @classmethod
+    def load(cls, path, default_deny=()):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(list(default_deny) + list(data.get("deny", [])), data.get("allow", []), data.get("apps", {}))
+    
+    def _pattern(self, text):
+        text = text.lower()
+        if text not in self.pattern_ids:
+            self.pattern_ids[text] = len(self.patterns)
+            self.patterns.append(text)
+        return self.pattern_ids[text]
+    
+    def _add(self, keyword, allow, app_id):
+        self.rules.setdefault(self._pattern(keyword), []).append((allow, app_id))
+    
+    def is_distraction(self, title):
+        found = self.matcher.find(title)
+        if not found:
+            return False
+        if self.allowed_apps & found:
+            return False
+        
+        denied = False
+        for pattern_id in found:
+            for allow, app_id in self.rules.get(pattern_id, ()):
+                if app_id is not None and app_id not in found:
+                    continue
+                if allow:
+                    return False
+                denied = True
+        return denied
 
 
+# Polls the active window title on its own thread at a low rate and only
+# re-evaluates the rules when the title changes. check_distractions() just
+# returns the cached verdict, so the camera loop never waits on the OS.
 class DistractionMonitor:    
-    def __init__(self, keywords):
+    def __init__(self, keywords, rules=None, poll_interval=0.5):
         self.keywords = keywords
+        self.rules = rules or DistractionRules(deny=keywords)
+        self.poll_interval = poll_interval
+        self.title = None
+        self.distraction = None
+        self.title_changes = 0
+        self.stop_event = threading.Event()
+        self.thread = None
     
     def get_active_window_title(self):
         try:
+            import pygetwindow as gw
             window = gw.getActiveWindow()
             return window.title.lower() if window else ""
         except Exception:
             return ""
     
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.poll()
+        self.thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.poll_interval * 2)
+            self.thread = None
+    
+    def poll(self):
+        title = self.get_active_window_title()
+        if title == self.title:
+            return False
+        self.title = title
+        self.distraction = title if self.rules.is_distraction(title) else None
+        self.title_changes += 1
+        return True
+    
+    def _poll_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            self.poll()
+    
     def check_distractions(self):
-        active_window = self.get_active_window_title()
-        for keyword in self.keywords:
-            if keyword in active_window:
-                return active_window
-        return None
+        return self.distraction
 
 
 # UI & NOTIFICATIONS
 
+# Draws the annotated preview on its own thread at a capped frame rate. The
+# analysis loop only hands over references to the latest result and frame, so
+# plotting and imshow never hold it up; anything submitted between two renders
+# is simply overwritten.
+class PreviewRenderer:
+    def __init__(self, fps=5, window_name="FocusFrame Vision"):
+        self.interval = 1.0 / fps if fps > 0 else 0
+        self.window_name = window_name
+        self.cond = threading.Condition()
+        self.pending = None
+        self.running = False
+        self.thread = None
+        self.frames_rendered = 0
+    
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._render_loop, daemon=True)
+        self.thread.start()
+    
+    def submit(self, results, frame, overlay=None):
+        with self.cond:
+            self.pending = (results, frame, overlay)
+            self.cond.notify()
+    
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self.pending = None
+    
+    def _render_loop(self):
+        while True:
+            with self.cond:
+                while self.running and self.pending is None:
+                    self.cond.wait()
+                if not self.running:
+                    break
+                results, frame, overlay = self.pending
+                self.pending = None
+            
+            started = time.time()
+            try:
+                self._render(results, frame, overlay)
+            except cv2.error as e:
+                print(f"WARNING: Preview disabled ({e.err}). Use --headless to skip it.")
+                break
+            self.frames_rendered += 1
+            
+            time.sleep(max(0, started + self.interval - time.time()))
+        
+        cv2.destroyAllWindows()
+    
+    def _render(self, results, frame, overlay):
+        annotated_frame = results[0].plot(img=frame) if results else frame.copy()
+        if overlay is not None:
+            text, color = overlay
+            cv2.putText(annotated_frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+        cv2.imshow(self.window_name, annotated_frame)
+        cv2.waitKey(1)
+
+
 class PhonePopup:
     def __init__(self):
         self.active = False
@@ -160,6 +1617,9 @@ class PhonePopup:
         self.active = True
         
         def run_popup():
+            import tkinter as tk
+            from tkinter import ttk
+            
             root = tk.Tk()
             root.title("PHONE DETECTED - FocusFrame")
             root.attributes('-topmost', True)
@@ -211,107 +1671,2342 @@ class PhonePopup:
             
             root.mainloop()
         
-        threading.Thread(target=run_popup, daemon=True).start()
-
-
-class EventLogger:    
-    COLORS = {
-        "Distraction": "\033[91m",  # Red
-        "System": "\033[94m",       # Blue
-        "Camera": "\033[92m"        # Green
-    }
-    RESET = "\033[0m"
+        threading.Thread(target=run_popup, daemon=True).start()
+
+
+# Append-only JSONL file per session. Records are handed over through a queue
+# and written by a background thread that fsyncs in batches. A session file
+# whose last record isn't "end" belongs to a session that never finished
+# (crash, power loss) and can be recovered on the next start, unless the
+# process writing it is still alive: that process holds a lock on the
+# journal's .lock file for as long as the journal is open.
+class SessionJournal:
+    def __init__(self, directory, batch_size=64, fsync_interval=1.0, echo=False):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self.echo = echo
+        self.queue = queue.SimpleQueue()
+        self.path = None
+        self.lock = None
+        self.thread = None
+        self.records_written = 0
+    
+    # Never overwrites another session's journal: a session id that's taken
+    # (two sessions started in the same second) gets a -2, -3, ... suffix.
+    # Returns the id actually used.
+    def open(self, session_id, header):
+        os.makedirs(self.directory, exist_ok=True)
+        base, n = session_id, 1
+        while True:
+            # Lock first, so a journal is never seen without its lock
+            self.path = os.path.join(self.directory, f"{session_id}.jsonl")
+            self.lock = self._lock(self.lock_path(self.path))
+            if self.lock is not None:
+                try:
+                    self.file = open(self.path, "x", encoding="utf-8")
+                    break
+                except FileExistsError:
+                    self._unlock(self.lock, self.lock_path(self.path))
+            n += 1
+            session_id = f"{base}-{n}"
+        self.lock.truncate(0)
+        self.lock.write(str(os.getpid()))
+        self.lock.flush()
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+        self.write(dict(header, type="session", id=session_id))
+        return session_id
+    
+    def write(self, record):
+        self.queue.put(record)
+    
+    def close(self, footer):
+        if self.thread is None:
+            return
+        self.write(dict(footer, type="end"))
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        self._unlock(self.lock, self.lock_path(self.path))
+        self.lock = None
+    
+    def _writer_loop(self):
+        last_fsync = time.time()
+        pending = 0
+        done = False
+        
+        while not done:
+            try:
+                batch = [self.queue.get(timeout=self.fsync_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            for record in batch:
+                if record is None:
+                    done = True
+                    break
+                self.file.write(json.dumps(record) + "\n")
+                if self.echo and record.get("type") in ("event", "close"):
+                    print(EventLogger.format(record))
+                pending += 1
+            
+            if pending and (done or pending >= self.batch_size or time.time() - last_fsync >= self.fsync_interval):
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.records_written += pending
+                pending = 0
+                last_fsync = time.time()
+        
+        self.file.close()
+    
+    @staticmethod
+    def read(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn last line from a crash mid-write
+                    break
+    
+    # Event records in journal order, with the duration of every interval
+    # (EventLogger.open_interval) taken from its "close" record. Only the
+    # close records are parsed on the first pass.
+    @staticmethod
+    def events(path):
+        durations = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if '"type": "close"' in line:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    durations[record["interval"]] = record["duration"]
+        
+        for record in SessionJournal.read(path):
+            if record.get("type") == "event":
+                if record.get("interval") in durations:
+                    record["duration"] = durations[record["interval"]]
+                yield record
+    
+    @staticmethod
+    def is_finished(path):
+        last = None
+        for last in SessionJournal.read(path):
+            pass
+        return last is not None and last.get("type") == "end"
+    
+    @staticmethod
+    def lock_path(path):
+        return os.path.splitext(path)[0] + ".lock"
+    
+    # Exclusive, non-blocking lock on a lock file (None if another process
+    # holds it). The OS drops it when the holder dies, however it dies.
+    @staticmethod
+    def _lock(path):
+        f = open(path, "a+", encoding="utf-8")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+        return f
+    
+    @staticmethod
+    def _unlock(lock, path):
+        if lock is None:
+            return
+        lock.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    # True while the session's process is still running (journals from before
+    # lock files have none and count as dead). A stale lock file is removed.
+    @staticmethod
+    def is_live(path):
+        lock_path = SessionJournal.lock_path(path)
+        if not os.path.exists(lock_path):
+            return False
+        lock = SessionJournal._lock(lock_path)
+        if lock is None:
+            return True
+        SessionJournal._unlock(lock, lock_path)
+        return False
+    
+    # Journals of sessions that ended without an "end" record and whose
+    # process is gone. Another FocusFrame sharing the directory keeps its own.
+    @staticmethod
+    def find_unfinished(directory):
+        if not os.path.isdir(directory):
+            return []
+        paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl"))
+        return [path for path in paths if not SessionJournal.is_finished(path) and not SessionJournal.is_live(path)]
+
+
+# Events go to a bounded in-memory tail (for quick looks at recent activity)
+# and, when a session directory is configured, to that session's journal. The
+# journal's writer thread also does the console echo, so log() never blocks.
+class EventLogger:    
+    COLORS = {
+        "Distraction": "\033[91m",  # Red
+        "System": "\033[94m",       # Blue
+        "Camera": "\033[92m"        # Green
+    }
+    RESET = "\033[0m"
+    
+    def __init__(self, clock=None, echo=True, journal_dir=None, tail_size=500, fsync_interval=1.0):
+        self.tail = deque(maxlen=tail_size)
+        self.clock = clock or time.time
+        self.echo = echo
+        self.journal_dir = journal_dir
+        self.fsync_interval = fsync_interval
+        self.journal = None
+        self.session_id = None
+        self.intervals_opened = 0
+    
+    @classmethod
+    def format(cls, entry):
+        color = cls.COLORS.get(entry["source"], cls.COLORS["Camera"])
+        duration = entry.get("duration")
+        lasted = f" (for {ReportGenerator._format_seconds(duration)})" if duration is not None else ""
+        return f"{color}[{entry['time']}] [{entry['source']}] {entry['message']}{lasted}{cls.RESET}"
+    
+    def start_session(self, start_time, name=None):
+        self.clear()
+        self.session_id = start_time.strftime("%Y%m%d-%H%M%S") + (f"-{name}" if name else "")
+        if self.journal_dir is None:
+            return None
+        self.journal = SessionJournal(self.journal_dir, fsync_interval=self.fsync_interval, echo=self.echo)
+        self.session_id = self.journal.open(self.session_id, {"start": start_time.timestamp()})
+        return self.journal.path
+    
+    def end_session(self, end_time):
+        if self.journal is not None:
+            self.journal.close({"end": end_time.timestamp()})
+    
+    # start: the event's time, if not now. clip: path of the evidence clip for
+    # this event (see ClipRecorder). since: when a state the event reports on
+    # began (the away event is only logged once the absence time has passed).
+    # interval: see open_interval.
+    def log(self, source, message, start=None, duration=None, clip=None, since=None, interval=None):
+        now = self.clock() if start is None else start
+        entry = {
+            "type": "event",
+            "ts": now,
+            "time": datetime.datetime.fromtimestamp(now).strftime("%H:%M:%S"),
+            "source": source,
+            "message": message
+        }
+        if duration is not None:
+            entry["duration"] = round(duration, 3)
+        if clip is not None:
+            entry["clip"] = clip
+        if since is not None:
+            entry["since"] = since
+        if interval is not None:
+            entry["interval"] = interval
+        self.tail.append(entry)
+        
+        if self.journal is not None and self.journal.thread is not None:
+            # An interval's entry gets its duration later; the writer thread
+            # must see it as it was opened
+            self.journal.write(entry if interval is None else dict(entry))
+        elif self.echo:
+            print(self.format(entry))
+        return entry
+    
+    # A distraction interval (see IntervalLog) is logged when it opens, so its
+    # row sits in time order, and gets its duration when it closes: in place
+    # for the tail, as a "close" record for the journal
+    def open_interval(self, source, message, start, clip=None):
+        self.intervals_opened += 1
+        return self.log(source, message, start, clip=clip, interval=self.intervals_opened)
+    
+    def close_interval(self, entry, duration):
+        entry["duration"] = round(duration, 3)
+        if self.journal is not None and self.journal.thread is not None:
+            self.journal.write(dict(entry, type="close"))
+        elif self.echo:
+            print(self.format(entry))
+    
+    # Every event of the session: from the journal when there is one (call
+    # end_session first so it's flushed), otherwise whatever the tail holds
+    def events(self):
+        if self.journal is not None:
+            return SessionJournal.events(self.journal.path)
+        return iter(list(self.tail))
+    
+    def clear(self):
+        self.tail.clear()
+
+
+# Distractions as intervals instead of a log line per sighting. Every kind of
+# event (the phone, each app) has its own debounce state: the first sighting
+# opens an interval, later ones extend it, and it closes once that kind hasn't
+# been seen for its gap. An open interval can carry one value (its logged
+# entry, see EventLogger.open_interval) until it closes. Closed intervals are
+# kept as columns (kind code, start, duration) in arrays that grow by
+# doubling, so totals per kind are a bincount.
+class IntervalLog:
+    def __init__(self, capacity=64):
+        self.kinds = []
+        self.codes = {}
+        self.open = {}
+        self.size = 0
+        self.kind = np.empty(capacity, dtype=np.int32)
+        self.start = np.empty(capacity, dtype=np.float64)
+        self.duration = np.empty(capacity, dtype=np.float32)
+    
+    def reset(self):
+        self.open.clear()
+        self.size = 0
+    
+    # True when this sighting opened a new interval
+    def see(self, source, message, current_time, gap):
+        code = self.codes.get((source, message))
+        if code is None:
+            code = self.codes[(source, message)] = len(self.kinds)
+            self.kinds.append((source, message))
+        
+        interval = self.open.get(code)
+        if interval is not None:
+            interval[1] = current_time
+            return False
+        self.open[code] = [current_time, current_time, gap, None]
+        return True
+    
+    def attach(self, source, message, data):
+        self.open[self.codes[(source, message)]][3] = data
+    
+    # Closes every interval whose kind went unseen for its gap; each comes
+    # back as (source, message, start, duration, attached data)
+    def expire(self, current_time):
+        if not self.open:
+            return []
+        stale = [code for code, (_, last, gap, _) in self.open.items() if current_time - last > gap]
+        return [self._close(code) for code in stale]
+    
+    def close_all(self):
+        return [self._close(code) for code in list(self.open)]
+    
+    def _close(self, code):
+        start, last, _, data = self.open.pop(code)
+        if self.size == len(self.kind):
+            for name in ("kind", "start", "duration"):
+                column = getattr(self, name)
+                grown = np.empty(2 * len(column), dtype=column.dtype)
+                grown[:self.size] = column
+                setattr(self, name, grown)
+        
+        i = self.size
+        self.kind[i], self.start[i], self.duration[i] = code, start, last - start
+        self.size += 1
+        return self.kinds[code] + (start, last - start, data)
+    
+    # {(source, message): (intervals, seconds)} over the closed intervals
+    def totals(self):
+        kind = self.kind[:self.size]
+        counts = np.bincount(kind, minlength=len(self.kinds))
+        seconds = np.bincount(kind, weights=self.duration[:self.size], minlength=len(self.kinds))
+        return {self.kinds[code]: (int(counts[code]), float(seconds[code])) for code in np.flatnonzero(counts)}
+    
+    def summary(self):
+        totals = sorted(self.totals().items(), key=lambda item: -item[1][1])
+        if not totals:
+            return "none"
+        fmt = ReportGenerator._format_seconds
+        return ", ".join(f"{message} x{count} ({fmt(seconds)})" for (_, message), (count, seconds) in totals)
+
+
+# Short evidence clips around phone / away events. The analysis loop writes a
+# downscaled copy of every frame (at most `fps` a second) into a preallocated
+# ring, resizing straight into the slot, so nothing is allocated per frame.
+# trigger() only notes the event; once its post-event window has been
+# captured, the window's frames are copied out of the ring once and a
+# background thread encodes them into a clip, then evicts the oldest clips
+# until the directory is back under its quota.
+class ClipRecorder:
+    EXTENSION = ".avi"
+    
+    # backdate: how far before the trigger an event can be anchored (the away
+    # event's clip is centered on when the person was last seen, ABSENCE_TIME
+    # earlier), so the ring holds that much extra history, plus a second for
+    # the frame that notices at a low analysis rate
+    def __init__(self, directory, pre_seconds=5.0, post_seconds=5.0, fps=5.0, width=320, quota_mb=200,
+                 backdate=0.0):
+        self.directory = directory
+        self.pre = pre_seconds
+        self.post = post_seconds
+        self.fps = fps
+        self.width = width
+        self.quota = int(quota_mb * 1024 * 1024)
+        history = max(post_seconds, backdate + 1.0) if backdate else post_seconds
+        self.slots = int(np.ceil((pre_seconds + history) * fps)) + 2
+        self.frames = None
+        self.times = np.full(self.slots, -np.inf)
+        self.next_slot = 0
+        self.last_push = -np.inf
+        self.pending = []
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.clips_written = 0
+        self.clips_evicted = 0
+    
+    # Counters start over with each camera period, like the other stats
+    # logged when it closes
+    def reset(self):
+        self.times.fill(-np.inf)
+        self.next_slot = 0
+        self.last_push = -np.inf
+        self.clips_written = 0
+        self.clips_evicted = 0
+    
+    def push(self, frame, current_time):
+        if current_time - self.last_push >= 1.0 / self.fps:
+            height, width = frame.shape[:2]
+            size = (self.width, max(2, int(round(height * self.width / width / 2)) * 2))
+            if self.frames is None or self.frames.shape[1:3] != (size[1], size[0]):
+                self.frames = np.empty((self.slots, size[1], size[0], 3), dtype=np.uint8)
+                self.times.fill(-np.inf)
+            cv2.resize(frame, size, dst=self.frames[self.next_slot], interpolation=cv2.INTER_AREA)
+            self.times[self.next_slot] = current_time
+            self.next_slot = (self.next_slot + 1) % self.slots
+            self.last_push = current_time
+        
+        while self.pending and current_time >= self.pending[0][0] + self.post:
+            self._snapshot(*self.pending.pop(0))
+    
+    # Reserves the clip's path (for the event record); the file shows up once
+    # the post-event window has been captured and encoded. event_time may lie
+    # up to backdate seconds in the past.
+    def trigger(self, tag, event_time, session_id=None):
+        stamp = datetime.datetime.fromtimestamp(event_time).strftime("%Y%m%d-%H%M%S")
+        name = "_".join(part for part in (session_id, stamp, tag) if part)
+        path = os.path.abspath(os.path.join(self.directory, name + self.EXTENSION))
+        # A backdated trigger can be due before ones already pending
+        self.pending.append((event_time, path))
+        self.pending.sort()
+        return path
+    
+    def _snapshot(self, event_time, path):
+        if self.frames is None:
+            return
+        window = np.flatnonzero((self.times >= event_time - self.pre) & (self.times <= event_time + self.post))
+        if window.size == 0:
+            return
+        window = window[np.argsort(self.times[window])]
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._encoder_loop, daemon=True)
+            self.thread.start()
+        self.queue.put((path, self.frames[window], self.times[window]))
+    
+    # Encodes what's been captured of every pending clip and waits until all
+    # clips are on disk
+    def flush(self):
+        while self.pending:
+            self._snapshot(*self.pending.pop(0))
+        if self.thread is not None:
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+    
+    def _encoder_loop(self):
+        while True:
+            job = self.queue.get()
+            if isinstance(job, threading.Event):
+                job.set()
+                continue
+            try:
+                self._encode(*job)
+                self._evict()
+            except Exception as e:
+                print(f">>> {Config.APP_NAME}: Could not write clip {job[0]}: {e}")
+    
+    # Motion JPEG: every OpenCV build can write it. Held frames are repeated
+    # so the clip plays back in real time even when the analysis rate dropped
+    # below the clip rate (e.g. while away).
+    def _encode(self, path, frames, times):
+        os.makedirs(self.directory, exist_ok=True)
+        height, width = frames.shape[1:3]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), self.fps, (width, height))
+        
+        ticks = np.arange(times[0], times[-1] + 1e-6, 1.0 / self.fps)
+        for i in np.searchsorted(times, ticks, side="right") - 1:
+            writer.write(frames[i])
+        writer.release()
+        self.clips_written += 1
+    
+    def _evict(self):
+        clips = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(self.EXTENSION):
+                stat = os.stat(path)
+                clips.append((stat.st_mtime, stat.st_size, path))
+        clips.sort()
+        total = sum(size for _, size, _ in clips)
+        for _, size, path in clips[:-1]:
+            if total <= self.quota:
+                break
+            os.remove(path)
+            total -= size
+            self.clips_evicted += 1
+    
+    def summary(self):
+        return (f"{self.clips_written} clips written, {self.clips_evicted} evicted "
+                f"(quota {self.quota / (1024 * 1024):g} MB)")
+
+
+# Running totals for the report header, built in the same single pass that
+# writes the rows: away vs. focused time, phone / app distraction counts (and
+# time, for interval records) and a per-Pomodoro-cycle breakdown. The same
+# totals are also bucketed per local hour ("YYYY-MM-DD HH") and per (day, app)
+# for the history store.
+class SessionStats:
+    def __init__(self, start_ts, end_ts):
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.events = 0
+        self.away_seconds = 0.0
+        self.away_since = None
+        self.break_seconds = 0.0
+        self.break_since = None
+        self.away_over_break = False
+        self.phone_count = 0
+        self.phone_seconds = 0.0
+        self.app_count = 0
+        self.apps = {}
+        self.app_seconds = {}
+        self.cycles = []
+        self.cycle = None
+        self.hours = {}
+        self.app_days = {}
+        self._bucket = (None, None, None, None)
+    
+    def add(self, entry):
+        self.events += 1
+        ts = entry.get("ts", self.start_ts)
+        message = entry["message"]
+        
+        if message == "User Away from Desk":
+            # Logged once the absence time has passed; since is when the
+            # person was last seen
+            if self.away_since is None:
+                self.away_since = entry.get("since", ts)
+        elif message == "User returned":
+            self._close_away(ts)
+        elif message == "Cell Phone Detected":
+            duration = entry.get("duration") or 0.0
+            self.phone_count += 1
+            self.phone_seconds += duration
+            self._hour(ts)["phone"] += 1
+            self._spread("phone_seconds", ts, ts + duration)
+            if self.cycle is not None:
+                self.cycle["phone"] += 1
+        elif message.startswith("App: "):
+            duration = entry.get("duration") or 0.0
+            self.app_count += 1
+            app = message[5:]
+            self.apps[app] = self.apps.get(app, 0) + 1
+            self.app_seconds[app] = self.app_seconds.get(app, 0.0) + duration
+            self._hour(ts)["apps"] += 1
+            # Credited to the day the interval started on
+            day_key = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+            day = self.app_days.setdefault((day_key, app), [0, 0.0])
+            day[0] += 1
+            day[1] += duration
+            self._spread("app_seconds", ts, ts + duration)
+            if self.cycle is not None:
+                self.cycle["apps"] += 1
+        elif message.startswith("Pomodoro Cycle ") and entry["source"] == "System":
+            # A cycle's work period runs until its break (or the next cycle),
+            # a break until the next work period (or the end)
+            self._end_cycle(ts)
+            self._end_break(ts)
+            if "- WORK" in message:
+                self.cycle = {"name": message.split(" - ")[0], "start": ts, "end": None,
+                              "away": 0.0, "phone": 0, "apps": 0}
+            elif "- BREAK" in message:
+                self._start_break(ts)
+    
+    # Bucket for the local hour containing ts; the last one is cached since
+    # events arrive in time order
+    def _hour(self, ts):
+        start, end, key, bucket = self._bucket
+        if start is None or not start <= ts < end:
+            hour = datetime.datetime.fromtimestamp(ts).replace(minute=0, second=0, microsecond=0)
+            start = hour.timestamp()
+            end = (hour + datetime.timedelta(hours=1)).timestamp()
+            key = hour.strftime("%Y-%m-%d %H")
+            bucket = self.hours.setdefault(key, {"covered": 0.0, "away": 0.0, "breaks": 0.0, "phone": 0, "apps": 0,
+                                                 "phone_seconds": 0.0, "app_seconds": 0.0})
+            self._bucket = (start, end, key, bucket)
+        return bucket
+    
+    def _spread(self, field, start_ts, end_ts):
+        ts = start_ts
+        while ts < end_ts:
+            bucket = self._hour(ts)
+            stop = min(end_ts, self._bucket[1])
+            bucket[field] += stop - ts
+            ts = stop
+    
+    def _cycle_away(self, ts):
+        if self.cycle is not None and self.away_since is not None:
+            self.cycle["away"] += max(0.0, ts - max(self.away_since, self.cycle["start"]))
+    
+    def _close_away(self, ts):
+        if self.away_since is None:
+            return
+        self.away_seconds += ts - self.away_since
+        self._spread("away", self.away_since, ts)
+        self._cycle_away(ts)
+        self.away_since = None
+    
+    def _end_cycle(self, ts):
+        if self.cycle is None:
+            return
+        self._cycle_away(ts)
+        self.cycle["end"] = ts
+        self.cycles.append(self.cycle)
+        self.cycle = None
+    
+    # Breaks are neither focused nor away. Someone still away when the break
+    # starts (the camera is off during it) is away again once it ends, until
+    # they're seen.
+    def _start_break(self, ts):
+        self.away_over_break = self.away_since is not None
+        self._close_away(ts)
+        self.break_since = ts
+    
+    def _end_break(self, ts):
+        if self.break_since is None:
+            return
+        self.break_seconds += ts - self.break_since
+        self._spread("breaks", self.break_since, ts)
+        self.break_since = None
+        if self.away_over_break:
+            self.away_since = ts
+            self.away_over_break = False
+    
+    def finish(self):
+        self._end_cycle(self.end_ts)
+        self._end_break(self.end_ts)
+        self._close_away(self.end_ts)
+        self._spread("covered", self.start_ts, self.end_ts)
+    
+    @property
+    def focused_seconds(self):
+        return max(0.0, (self.end_ts - self.start_ts) - self.away_seconds - self.break_seconds)
+    
+    def top_apps(self, n=10):
+        return sorted(self.apps.items(), key=lambda item: -item[1])[:n]
+
+
+class ReportGenerator:    
+    STYLE = """
+            <style>
+                body { font-family: monospace; padding: 20px; background: #f5f5f5; }
+                h1 { color: #333; }
+                table { border-collapse: collapse; width: 100%; background: white; margin-bottom: 20px; }
+                th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+                th { background-color: #4CAF50; color: white; }
+                tr:nth-child(even) { background-color: #f9f9f9; }
+                .distraction { color: red; font-weight: bold; }
+                .camera { color: green; }
+                .system { color: blue; }
+                .count { color: #666; }
+                .pages a { margin-right: 8px; }
+            </style>
+    """
+    
+    @staticmethod
+    def _format_seconds(seconds):
+        return str(datetime.timedelta(seconds=int(seconds)))
+    
+    @staticmethod
+    def _collapse(entries):
+        # Consecutive identical events become one row: (entry, last time, count).
+        # Intervals already cover their whole stretch and events with a clip
+        # keep their link, so those stay separate.
+        run, last_time, count = None, None, 0
+        for entry in entries:
+            if (run is not None and entry["source"] == run["source"] and entry["message"] == run["message"]
+                    and not any(key in entry or key in run for key in ("duration", "clip", "interval"))):
+                last_time = entry["time"]
+                count += 1
+                continue
+            if run is not None:
+                yield run, last_time, count
+            run, last_time, count = entry, entry["time"], 1
+        if run is not None:
+            yield run, last_time, count
+    
+    @staticmethod
+    def _page_name(output_file, page):
+        if page == 1:
+            return output_file
+        base, ext = os.path.splitext(output_file)
+        return f"{base}_p{page}{ext}"
+    
+    @staticmethod
+    def _page_html(title, body):
+        return (f"<html>\n<head>\n<meta charset='utf-8'>\n<title>{title}</title>\n"
+                f"{ReportGenerator.STYLE}\n</head>\n<body>\n<h1>{title}</h1>\n{body}\n</body>\n</html>\n")
+    
+    @staticmethod
+    def _daily_html(days):
+        fmt = ReportGenerator._format_seconds
+        parts = ["<table><tr><th>Day</th><th>Sessions</th><th>Focused</th><th>Away</th><th>Phone</th><th>Apps</th></tr>"]
+        for day, sessions, focused, away, phone, apps, phone_seconds, app_seconds in days:
+            parts.append(f"<tr><td>{day}</td><td>{sessions}</td><td>{fmt(focused)}</td><td>{fmt(away)}</td>"
+                         f"<td>{phone} ({fmt(phone_seconds)})</td><td>{apps} ({fmt(app_seconds)})</td></tr>")
+        parts.append("</table>")
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _apps_html(top, seconds=None):
+        fmt = ReportGenerator._format_seconds
+        if seconds is None:
+            parts = ["<table><tr><th>Distracting app</th><th>Times logged</th></tr>"]
+        else:
+            parts = ["<table><tr><th>Distracting app</th><th>Times logged</th><th>Time</th></tr>"]
+        for app, count in top:
+            time_cell = f"<td>{fmt(seconds.get(app, 0.0))}</td>" if seconds is not None else ""
+            parts.append(f"<tr><td>{html.escape(app)}</td><td>{count}</td>{time_cell}</tr>")
+        parts.append("</table>")
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _summary_html(stats, duration, history=None):
+        fmt = ReportGenerator._format_seconds
+        app_seconds = sum(stats.app_seconds.values())
+        breaks = stats.break_seconds >= 1
+        parts = [
+            f"<p><strong>Duration:</strong> {str(duration).split('.')[0]}</p>",
+            "<table>",
+            f"<tr><th>Focused</th><th>Away</th>{'<th>Breaks</th>' if breaks else ''}"
+            "<th>Phone distractions</th><th>App distractions</th><th>Events</th></tr>",
+            f"<tr><td>{fmt(stats.focused_seconds)}</td><td>{fmt(stats.away_seconds)}</td>"
+            f"{f'<td>{fmt(stats.break_seconds)}</td>' if breaks else ''}"
+            f"<td>{stats.phone_count}{f' ({fmt(stats.phone_seconds)})' if stats.phone_seconds else ''}</td>"
+            f"<td>{stats.app_count}{f' ({fmt(app_seconds)})' if app_seconds else ''}</td>"
+            f"<td>{stats.events}</td></tr>",
+            "</table>",
+        ]
+        
+        if stats.cycles:
+            parts.append("<table><tr><th>Cycle</th><th>Work time</th><th>Away</th><th>Phone</th><th>Apps</th></tr>")
+            for cycle in stats.cycles:
+                work = cycle["end"] - cycle["start"]
+                parts.append(f"<tr><td>{html.escape(cycle['name'])}</td><td>{fmt(work)}</td>"
+                             f"<td>{fmt(cycle['away'])}</td><td>{cycle['phone']}</td><td>{cycle['apps']}</td></tr>")
+            parts.append("</table>")
+        
+        top = stats.top_apps()
+        if top:
+            parts.append(ReportGenerator._apps_html(top, stats.app_seconds if app_seconds else None))
+        
+        if history:
+            parts.append("<h2>Recent days</h2>")
+            parts.append(ReportGenerator._daily_html(history))
+        
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _nav_html(output_file, page, pages):
+        if pages == 1:
+            return ""
+        
+        def link(n, label):
+            href = html.escape(os.path.basename(ReportGenerator._page_name(output_file, n)))
+            return f"<a href='{href}'>{label}</a>"
+        
+        links = []
+        if page > 1:
+            links += [link(1, "&laquo; first"), link(page - 1, "&lsaquo; prev")]
+        links.append(f"<strong>page {page} of {pages}</strong>")
+        if page < pages:
+            links += [link(page + 1, "next &rsaquo;"), link(pages, "last &raquo;")]
+        return f"<p class='pages'>{' '.join(links)}</p>"
+    
+    # Streams the log into the report: rows go to per-page temp files while the
+    # summary is accumulated, then each page is assembled around its rows. Memory
+    # stays flat however many events there are. Pass stats (e.g. loaded from the
+    # history store) to use precomputed totals instead of counting the rows.
+    @staticmethod
+    def generate(log_data, start_time, end_time, output_file, open_browser=True, rows_per_page=5000,
+                 stats=None, history=None):
+
+        if not start_time:
+            return
+        
+        if not end_time:
+            end_time = datetime.datetime.now()
+        
+        duration = end_time - start_time
+        counting = stats is None
+        if counting:
+            stats = SessionStats(start_time.timestamp(), end_time.timestamp())
+            
+            def counted(entries):
+                for entry in entries:
+                    stats.add(entry)
+                    yield entry
+            
+            log_data = counted(log_data)
+        
+        # All rows go into one temp file; page_starts holds each page's offset.
+        # Clip links are relative to the report so the folder can be moved.
+        report_dir = os.path.dirname(os.path.abspath(output_file))
+        body = tempfile.TemporaryFile()
+        page_starts = [0]
+        rows = 0
+        for entry, last_time, count in ReportGenerator._collapse(log_data):
+            if rows == rows_per_page:
+                page_starts.append(body.tell())
+                rows = 0
+            
+            source = html.escape(entry["source"])
+            when = entry["time"] if count == 1 else f"{entry['time']} - {last_time}"
+            repeat = f" <span class='count'>(x{count})</span>" if count > 1 else ""
+            if entry.get("duration") is not None:
+                repeat = f" <span class='count'>(for {ReportGenerator._format_seconds(entry['duration'])})</span>"
+            if entry.get("clip"):
+                if os.path.exists(entry["clip"]):
+                    href = html.escape(os.path.relpath(entry["clip"], report_dir).replace(os.sep, "/"))
+                    repeat += f" <a href='{href}'>clip</a>"
+                else:
+                    repeat += " <span class='count'>(clip evicted)</span>"
+            body.write(f"<tr class='{source.lower()}'><td>{when}</td><td>{source}</td>"
+                       f"<td>{html.escape(entry['message'])}{repeat}</td></tr>\n".encode("utf-8"))
+            rows += 1
+        
+        if counting:
+            stats.finish()
+        summary = ReportGenerator._summary_html(stats, duration, history)
+        page_starts.append(body.tell())
+        pages = len(page_starts) - 1
+        
+        with body:
+            for page in range(1, pages + 1):
+                nav = ReportGenerator._nav_html(output_file, page, pages)
+                with open(ReportGenerator._page_name(output_file, page), "wb") as f:
+                    f.write(f"<html>\n<head>\n<meta charset='utf-8'>\n<title>FocusFrame Report</title>\n"
+                            f"{ReportGenerator.STYLE}\n</head>\n<body>\n<h1>FocusFrame Session Report</h1>\n"
+                            .encode("utf-8"))
+                    if page == 1:
+                        f.write((summary + "\n").encode("utf-8"))
+                    f.write((nav + "\n<table>\n<tr><th>Time</th><th>Type</th><th>Message</th></tr>\n").encode("utf-8"))
+                    
+                    body.seek(page_starts[page - 1])
+                    remaining = page_starts[page] - page_starts[page - 1]
+                    while remaining > 0:
+                        chunk = body.read(min(remaining, 1 << 20))
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                    
+                    f.write(f"</table>\n{nav}\n</body>\n</html>\n".encode("utf-8"))
+        
+        # Pages left over from an earlier, longer report under the same name
+        page = pages + 1
+        while os.path.exists(ReportGenerator._page_name(output_file, page)):
+            os.remove(ReportGenerator._page_name(output_file, page))
+            page += 1
+        
+        if open_browser:
+            webbrowser.open('file://' + os.path.abspath(output_file))
+    
+    # Multi-session report over a date range, read entirely from the store's
+    # daily / per-app aggregates
+    @staticmethod
+    def generate_history(store, since, until, output_file, open_browser=True):
+        fmt = ReportGenerator._format_seconds
+        days = store.daily(since, until)
+        sessions = sum(row[1] for row in days)
+        focused = sum(row[2] for row in days)
+        away = sum(row[3] for row in days)
+        
+        parts = [
+            f"<p><strong>Period:</strong> {since} - {until}</p>",
+            "<table>",
+            "<tr><th>Sessions</th><th>Focused</th><th>Away</th><th>Phone distractions</th><th>App distractions</th></tr>",
+            f"<tr><td>{sessions}</td><td>{fmt(focused)}</td><td>{fmt(away)}</td>"
+            f"<td>{sum(row[4] for row in days)} ({fmt(sum(row[6] for row in days))})</td>"
+            f"<td>{sum(row[5] for row in days)} ({fmt(sum(row[7] for row in days))})</td></tr>",
+            "</table>",
+        ]
+        top = store.top_apps(since, until)
+        if top:
+            parts.append(ReportGenerator._apps_html([(app, count) for app, count, _ in top],
+                                                    {app: seconds for app, _, seconds in top}))
+        parts.append(ReportGenerator._daily_html(days))
+        
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(ReportGenerator._page_html("FocusFrame History", "\n".join(parts)))
+        
+        if open_browser:
+            webbrowser.open('file://' + os.path.abspath(output_file))
+
+
+# HISTORY
+
+# SQLite history of finished sessions. Raw events and Pomodoro cycles are kept
+# per session, and per-hour / per-day / per-app-per-day totals are rolled up
+# when a session is recorded, so history queries and reports only ever read
+# the small aggregate tables (a few rows per day however many events there are).
+class SessionStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            start_ts REAL NOT NULL,
+            end_ts REAL NOT NULL,
+            focused REAL NOT NULL,
+            away REAL NOT NULL,
+            phone INTEGER NOT NULL,
+            apps INTEGER NOT NULL,
+            events INTEGER NOT NULL,
+            phone_seconds REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS sessions_start ON sessions (start_ts);
+        
+        CREATE TABLE IF NOT EXISTS cycles (
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            name TEXT NOT NULL,
+            start_ts REAL NOT NULL,
+            end_ts REAL NOT NULL,
+            away REAL NOT NULL,
+            phone INTEGER NOT NULL,
+            apps INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS cycles_session ON cycles (session_id);
+        
+        CREATE TABLE IF NOT EXISTS events (
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            ts REAL NOT NULL,
+            time TEXT NOT NULL,
+            source TEXT NOT NULL,
+            message TEXT NOT NULL,
+            duration REAL,
+            clip TEXT
+        );
+        CREATE INDEX IF NOT EXISTS events_session_ts ON events (session_id, ts);
+        CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+        
+        CREATE TABLE IF NOT EXISTS session_apps (
+            session_id INTEGER NOT NULL REFERENCES sessions (id),
+            app TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (session_id, app)
+        ) WITHOUT ROWID;
+        
+        CREATE TABLE IF NOT EXISTS hourly (
+            hour TEXT PRIMARY KEY,
+            focused REAL NOT NULL,
+            away REAL NOT NULL,
+            phone INTEGER NOT NULL,
+            apps INTEGER NOT NULL,
+            phone_seconds REAL NOT NULL DEFAULT 0,
+            app_seconds REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        
+        CREATE TABLE IF NOT EXISTS daily (
+            day TEXT PRIMARY KEY,
+            sessions INTEGER NOT NULL,
+            focused REAL NOT NULL,
+            away REAL NOT NULL,
+            phone INTEGER NOT NULL,
+            apps INTEGER NOT NULL,
+            phone_seconds REAL NOT NULL DEFAULT 0,
+            app_seconds REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        
+        CREATE TABLE IF NOT EXISTS app_daily (
+            day TEXT NOT NULL,
+            app TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            seconds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, app)
+        ) WITHOUT ROWID;
+    """
+    
+    # Columns added since the first schema, for stores created before them
+    ADDED_COLUMNS = [
+        ("sessions", "phone_seconds", "REAL NOT NULL DEFAULT 0"),
+        ("events", "duration", "REAL"),
+        ("events", "clip", "TEXT"),
+        ("session_apps", "seconds", "REAL NOT NULL DEFAULT 0"),
+        ("hourly", "phone_seconds", "REAL NOT NULL DEFAULT 0"),
+        ("hourly", "app_seconds", "REAL NOT NULL DEFAULT 0"),
+        ("daily", "phone_seconds", "REAL NOT NULL DEFAULT 0"),
+        ("daily", "app_seconds", "REAL NOT NULL DEFAULT 0"),
+        ("app_daily", "seconds", "REAL NOT NULL DEFAULT 0"),
+    ]
+    
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        for table, column, decl in self.ADDED_COLUMNS:
+            if column not in {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+    
+    def close(self):
+        self.conn.close()
+    
+    @staticmethod
+    def day_range(days, until=None):
+        until = until or datetime.date.today()
+        since = until - datetime.timedelta(days=days - 1)
+        return since.isoformat(), until.isoformat()
+    
+    def session_id(self, name):
+        row = self.conn.execute("SELECT id FROM sessions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+    
+    # One pass over the events: each is inserted and counted, then the session
+    # row, cycles and the rolled-up aggregates are written in the same
+    # transaction. Recording a session that's already stored is a no-op.
+    def record_session(self, name, start_ts, end_ts, events):
+        existing = self.session_id(name)
+        if existing is not None:
+            return existing
+        
+        stats = SessionStats(start_ts, end_ts)
+        with self.conn:
+            session_id = self.conn.execute(
+                "INSERT INTO sessions (name, start_ts, end_ts, focused, away, phone, apps, events) "
+                "VALUES (?, ?, ?, 0, 0, 0, 0, 0)", (name, start_ts, end_ts)).lastrowid
+            
+            def rows():
+                for entry in events:
+                    stats.add(entry)
+                    yield (session_id, entry.get("ts", start_ts), entry["time"], entry["source"], entry["message"],
+                           entry.get("duration"), entry.get("clip"))
+            
+            self.conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows())
+            stats.finish()
+            
+            self.conn.execute(
+                "UPDATE sessions SET focused = ?, away = ?, phone = ?, apps = ?, events = ?, phone_seconds = ? "
+                "WHERE id = ?",
+                (stats.focused_seconds, stats.away_seconds, stats.phone_count, stats.app_count, stats.events,
+                 stats.phone_seconds, session_id))
+            self.conn.executemany(
+                "INSERT INTO cycles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(session_id, c["name"], c["start"], c["end"], c["away"], c["phone"], c["apps"])
+                 for c in stats.cycles])
+            self.conn.executemany(
+                "INSERT INTO session_apps VALUES (?, ?, ?, ?)",
+                [(session_id, app, count, stats.app_seconds.get(app, 0.0)) for app, count in stats.apps.items()])
+            
+            days = {}
+            hours = []
+            for hour, b in stats.hours.items():
+                focused = max(0.0, b["covered"] - b["away"] - b["breaks"])
+                hours.append((hour, focused, b["away"], b["phone"], b["apps"], b["phone_seconds"], b["app_seconds"]))
+                day = days.setdefault(hour[:10], [0, 0.0, 0.0, 0, 0, 0.0, 0.0])
+                day[1] += focused
+                day[2] += b["away"]
+                day[3] += b["phone"]
+                day[4] += b["apps"]
+                day[5] += b["phone_seconds"]
+                day[6] += b["app_seconds"]
+            start_day = datetime.datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d")
+            days.setdefault(start_day, [0, 0.0, 0.0, 0, 0, 0.0, 0.0])[0] += 1
+            
+            self.conn.executemany(
+                "INSERT INTO hourly (hour, focused, away, phone, apps, phone_seconds, app_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (hour) DO UPDATE SET "
+                "focused = focused + excluded.focused, away = away + excluded.away, "
+                "phone = phone + excluded.phone, apps = apps + excluded.apps, "
+                "phone_seconds = phone_seconds + excluded.phone_seconds, "
+                "app_seconds = app_seconds + excluded.app_seconds", hours)
+            self.conn.executemany(
+                "INSERT INTO daily (day, sessions, focused, away, phone, apps, phone_seconds, app_seconds) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (day) DO UPDATE SET "
+                "sessions = sessions + excluded.sessions, focused = focused + excluded.focused, "
+                "away = away + excluded.away, phone = phone + excluded.phone, apps = apps + excluded.apps, "
+                "phone_seconds = phone_seconds + excluded.phone_seconds, "
+                "app_seconds = app_seconds + excluded.app_seconds",
+                [(day,) + tuple(totals) for day, totals in days.items()])
+            self.conn.executemany(
+                "INSERT INTO app_daily (day, app, count, seconds) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (day, app) DO UPDATE SET "
+                "count = count + excluded.count, seconds = seconds + excluded.seconds",
+                [(day, app, count, seconds) for (day, app), (count, seconds) in stats.app_days.items()])
+        return session_id
+    
+    # Finished journals that aren't in the store yet (unfinished ones are left
+    # for crash recovery)
+    def import_journals(self, directory):
+        imported = []
+        if not os.path.isdir(directory):
+            return imported
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            session = os.path.splitext(name)[0]
+            if not name.endswith(".jsonl") or self.session_id(session) is not None:
+                continue
+            header = last = None
+            for last in SessionJournal.read(path):
+                header = header or last
+            if header is None or header.get("type") != "session" or last.get("type") != "end":
+                continue
+            self.record_session(session, header["start"], last["end"], SessionJournal.events(path))
+            imported.append(path)
+        return imported
+    
+    def load_stats(self, session_id):
+        row = self.conn.execute(
+            "SELECT start_ts, end_ts, focused, away, phone, apps, events, phone_seconds FROM sessions WHERE id = ?",
+            (session_id,)).fetchone()
+        stats = SessionStats(row[0], row[1])
+        stats.away_seconds, stats.phone_count, stats.app_count, stats.events, stats.phone_seconds = row[3:]
+        # Whatever is neither focused nor away was spent on breaks
+        stats.break_seconds = max(0.0, row[1] - row[0] - row[2] - row[3])
+        for app, count, seconds in self.conn.execute(
+                "SELECT app, count, seconds FROM session_apps WHERE session_id = ?", (session_id,)):
+            stats.apps[app] = count
+            stats.app_seconds[app] = seconds
+        stats.cycles = [
+            {"name": name, "start": start, "end": end, "away": away, "phone": phone, "apps": apps}
+            for name, start, end, away, phone, apps in self.conn.execute(
+                "SELECT name, start_ts, end_ts, away, phone, apps FROM cycles WHERE session_id = ? ORDER BY start_ts",
+                (session_id,))
+        ]
+        return stats
+    
+    def session_events(self, session_id):
+        cursor = self.conn.execute(
+            "SELECT ts, time, source, message, duration, clip FROM events WHERE session_id = ? ORDER BY ts",
+            (session_id,))
+        for ts, time_str, source, message, duration, clip in cursor:
+            entry = {"type": "event", "ts": ts, "time": time_str, "source": source, "message": message}
+            if duration is not None:
+                entry["duration"] = duration
+            if clip is not None:
+                entry["clip"] = clip
+            yield entry
+    
+    # Range queries take inclusive "YYYY-MM-DD" bounds
+    def daily(self, since, until):
+        return self.conn.execute(
+            "SELECT day, sessions, focused, away, phone, apps, phone_seconds, app_seconds FROM daily "
+            "WHERE day BETWEEN ? AND ? ORDER BY day", (since, until)).fetchall()
+    
+    def hourly(self, since, until):
+        return self.conn.execute(
+            "SELECT hour, focused, away, phone, apps, phone_seconds, app_seconds FROM hourly "
+            "WHERE hour BETWEEN ? AND ? ORDER BY hour", (since, until + " 23")).fetchall()
+    
+    # (app, times logged, seconds)
+    def top_apps(self, since, until, limit=10):
+        return self.conn.execute(
+            "SELECT app, SUM(count) AS total, SUM(seconds) FROM app_daily WHERE day BETWEEN ? AND ? "
+            "GROUP BY app ORDER BY total DESC LIMIT ?", (since, until, limit)).fetchall()
+    
+    def sessions(self, limit=20):
+        return self.conn.execute(
+            "SELECT name, start_ts, end_ts, focused, away, phone, apps, events FROM sessions "
+            "ORDER BY start_ts DESC LIMIT ?", (limit,)).fetchall()
+
+
+# METRICS
+
+# Per-stage timings and counters for the hot loop. lap() records the time since
+# the previous mark under a stage name and returns a new mark; quantiles are
+# only computed from the recent-sample window when something scrapes them.
+class Metrics:
+    PREFIX = "focusframe"
+    
+    def __init__(self, window=2048):
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        self.counters = {}
+        self.gauges = {}
+    
+    def clock(self):
+        return time.perf_counter()
+    
+    def lap(self, stage, start):
+        now = time.perf_counter()
+        elapsed = now - start
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = deque(maxlen=self.window)
+            self.totals[stage] = [0.0, 0]
+        samples.append(elapsed)
+        total = self.totals[stage]
+        total[0] += elapsed
+        total[1] += 1
+        return now
+    
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    # Values read from other components at scrape time
+    def register_gauge(self, name, fn, kind="gauge"):
+        self.gauges[name] = (fn, kind)
+    
+    def quantiles(self, stage, qs=(0.5, 0.95, 0.99)):
+        values = sorted(tuple(self.samples.get(stage, ())))
+        if not values:
+            return {q: 0.0 for q in qs}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in qs}
+    
+    def render(self):
+        p = self.PREFIX
+        lines = [
+            f"# HELP {p}_stage_seconds Per-frame time spent in each pipeline stage (recent window).",
+            f"# TYPE {p}_stage_seconds summary",
+        ]
+        for stage in sorted(self.samples):
+            for q, value in self.quantiles(stage).items():
+                lines.append(f'{p}_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            total, n = self.totals[stage]
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {n}')
+        
+        for name in sorted(self.counters):
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            lines.append(f"{p}_{name}_total {self.counters[name]}")
+        
+        for name in sorted(self.gauges):
+            fn, kind = self.gauges[name]
+            try:
+                value = fn()
+            except Exception:
+                continue
+            metric = f"{p}_{name}_total" if kind == "counter" else f"{p}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value}")
+        
+        return "\n".join(lines) + "\n"
+
+
+# Stand-in used when metrics are off, so the hot loop never has to branch
+class NullMetrics:
+    def clock(self):
+        return 0
+    
+    def lap(self, stage, start):
+        return 0
+    
+    def count(self, name, amount=1):
+        pass
+    
+    def register_gauge(self, name, fn, kind="gauge"):
+        pass
+
+
+# Serves Metrics.render() on http://127.0.0.1:<port>/metrics and/or rewrites a
+# Prometheus text file (node_exporter textfile collector style) periodically.
+class MetricsExporter:
+    def __init__(self, metrics, port=None, path=None, interval=10.0):
+        self.metrics = metrics
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.server = None
+        self.stop_event = threading.Event()
+    
+    def start(self):
+        if self.port:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+            metrics = self.metrics
+            
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.rstrip("/") not in ("", "/metrics"):
+                        self.send_error(404)
+                        return
+                    body = metrics.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                
+                def log_message(self, format, *args):
+                    pass
+            
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f">>> {Config.APP_NAME}: METRICS ON http://127.0.0.1:{self.port}/metrics")
+        
+        if self.path:
+            threading.Thread(target=self._write_loop, daemon=True).start()
+    
+    def write_file(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.metrics.render())
+        os.replace(tmp, self.path)
+    
+    def _write_loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.write_file()
+    
+    def stop(self):
+        self.stop_event.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+        if self.path:
+            self.write_file()
+
+
+# TUNING
+
+# Per-frame inputs of the presence logic, recorded during replay for the
+# tuner: seconds since the session start, motion pixels (scaled to the full
+# frame, so they compare directly with MOTION_PIXEL_THRESHOLD) and the
+# confidence behind person_detected (fresh or tracked, 0 = no person).
+class PresenceTrace:
+    def __init__(self, start=0.0):
+        self.start = start
+        self.times = []
+        self.motion = []
+        self.person = []
+    
+    def record(self, current_time, motion_pixels, person_conf):
+        self.times.append(current_time - self.start)
+        self.motion.append(motion_pixels)
+        self.person.append(person_conf)
+    
+    def save(self, path, **meta):
+        np.savez_compressed(
+            path,
+            t=np.asarray(self.times, dtype=np.float64),
+            motion=np.asarray(self.motion, dtype=np.float32),
+            person=np.asarray(self.person, dtype=np.float32),
+            meta=json.dumps(meta)
+        )
+    
+    @staticmethod
+    def load(path):
+        with np.load(path) as data:
+            return data["t"], data["motion"], data["person"], json.loads(str(data["meta"]))
+
+
+# Runs PresenceDetector.update_score / check_presence_change for every
+# parameter combination at once. Whether a frame counts as active only depends
+# on the person-confidence x motion thresholds (K rows), and the score only on
+# the row and the decrement interval, so the per-frame update works on a small
+# (K, D) array. The away flag is (K, absence, presence, D) and is only touched
+# on frames where a score crossed a presence threshold or hit 0. Frames where
+# every row is active change nothing once the scores have saturated, so the
+# middle of those runs is skipped. Transitions are kept sparsely; time spent
+# away is summed from them afterwards.
+class PresenceSweep:
+    def __init__(self, confs, thresholds, absence, presence, decrement,
+                 score_max=5, increment=1, score_decrement=1):
+        self.confs = np.asarray(confs, dtype=np.float32)
+        self.thresholds = np.asarray(thresholds, dtype=np.float32)
+        self.absence = np.asarray(absence, dtype=np.float64)
+        self.presence = np.asarray(presence, dtype=np.int16)
+        self.decrement = np.asarray(decrement, dtype=np.float64)
+        self.score_max = score_max
+        self.increment = increment
+        self.score_decrement = score_decrement
+        self.rows = len(self.confs) * len(self.thresholds)
+        self.shape = (self.rows, len(self.absence), len(self.presence), len(self.decrement))
+    
+    # Parameters of every combination, in the order run() reports them
+    def combinations(self):
+        conf, threshold, absence, presence, decrement = np.meshgrid(
+            self.confs, self.thresholds, self.absence, self.presence, self.decrement, indexing="ij")
+        return {
+            "person_conf": conf.ravel(),
+            "motion_threshold": threshold.ravel(),
+            "absence_time": absence.ravel(),
+            "presence_threshold": presence.ravel(),
+            "decrement_interval": decrement.ravel(),
+        }
+    
+    # Ground truth: [start, end) away intervals in seconds since the start
+    @staticmethod
+    def transitions(away_intervals, duration):
+        away = [start for start, end in away_intervals]
+        returns = [end for start, end in away_intervals if end < duration]
+        return away, returns
+    
+    # Greedy one-to-one matching in time order: (matched, summed latency)
+    @staticmethod
+    def _match(predicted, labeled, tolerance):
+        matched, latency, j = 0, 0.0, 0
+        for t in predicted:
+            while j < len(labeled) and labeled[j] < t - tolerance:
+                j += 1
+            if j < len(labeled) and abs(t - labeled[j]) <= tolerance:
+                matched += 1
+                latency += t - labeled[j]
+                j += 1
+        return matched, latency
+    
+    def run(self, t, motion, person, away_intervals, tolerance=10.0):
+        n, rows = len(t), self.rows
+        label = np.zeros(n, dtype=bool)
+        for start, end in away_intervals:
+            label |= (t >= start) & (t < end)
+        # Each frame's state holds until the next one
+        dt = np.diff(t, append=t[-1])
+        cum_all = np.concatenate(([0.0], np.cumsum(dt)))
+        cum_away = np.concatenate(([0.0], np.cumsum(dt * label)))
+        
+        active = (person[:, None] > self.confs)[:, :, None] | (motion[:, None] > self.thresholds)[:, None, :]
+        active = active.reshape(n, rows, 1)
+        inactive = ~active
+        any_active = active.any(axis=(1, 2))
+        all_active = active.all(axis=(1, 2))
+        skip = {}
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], all_active.view(np.int8), [0]))))
+        for start, end in zip(edges[::2], edges[1::2]):
+            if end - start > self.score_max + 1:
+                skip[start + self.score_max] = end - 1
+        
+        # Score state per (row, decrement interval)
+        score = np.full((rows, len(self.decrement)), self.score_max, dtype=np.int16)
+        prev = np.empty_like(score)
+        steps = np.empty(score.shape)
+        last_decrement = np.zeros(score.shape)
+        last_seen = np.zeros((rows, 1))
+        # Away flag per combination
+        away = np.zeros(self.shape, dtype=bool)
+        flips = np.empty(self.shape, dtype=bool)
+        presence = self.presence[None, None, :, None]
+        absence = self.absence[None, :]
+        away_count = 0
+        events = []
+        
+        f = 0
+        while f < n:
+            # Saturated: only last_seen moves, and the last frame of the run sets it
+            f = skip.get(f, f)
+            tf, act = t[f], active[f]
+            np.copyto(prev, score)
+            np.add(score, self.increment, out=score, where=act)
+            np.minimum(score, self.score_max, out=score)
+            np.subtract(tf, last_decrement, out=steps)
+            np.divide(steps, self.decrement, out=steps)
+            np.floor(steps, out=steps)
+            steps *= inactive[f]
+            last_decrement += steps * self.decrement
+            np.minimum(steps, self.score_max, out=steps)
+            np.subtract(score, steps * self.score_decrement, out=score, casting="unsafe")
+            np.maximum(score, 0, out=score)
+            np.copyto(last_decrement, tf, where=act)
+            np.copyto(last_seen, tf, where=act)
+            
+            changed = False
+            # Returned: away, and the score crossed the presence threshold
+            if away_count and any_active[f]:
+                crossed = (prev[:, None, None, :] < presence) & (score[:, None, None, :] >= presence)
+                if crossed.any():
+                    np.logical_and(away, crossed, out=flips)
+                    changed = flips.any()
+            # Gone: present, score at 0 and the absence time has passed
+            if away_count < away.size:
+                zero = score <= 0
+                if zero.any():
+                    gone = zero[:, None, None, :] & (tf - last_seen >= absence)[:, :, None, None]
+                    if changed:
+                        flips |= gone & ~away
+                    else:
+                        np.greater(gone, away, out=flips)
+                        changed = flips.any()
+            if changed:
+                idx = np.flatnonzero(flips)
+                away ^= flips
+                state = away.ravel()[idx]
+                away_count += 2 * int(state.sum()) - len(idx)
+                events.append((f, idx, state))
+            f += 1
+        
+        labeled_away, labeled_returns = self.transitions(away_intervals, t[-1])
+        size = away.size
+        stats = {
+            "predicted": np.zeros(size, dtype=np.int64),
+            "matched": np.zeros(size, dtype=np.int64),
+            "latency": np.zeros(size),
+            "labeled": np.full(size, len(labeled_away) + len(labeled_returns), dtype=np.int64),
+            "away_time": np.zeros(size),
+            "overlap": np.zeros(size),
+            "label_away_time": np.full(size, cum_away[-1]),
+            "total_time": np.full(size, cum_all[-1]),
+        }
+        if not events:
+            return stats
+        
+        frames = np.concatenate([np.full(len(idx), f) for f, idx, _ in events])
+        combos = np.concatenate([idx for _, idx, _ in events])
+        kinds = np.concatenate([state for _, _, state in events])
+        order = np.argsort(combos, kind="stable")
+        frames, combos, kinds = frames[order], combos[order], kinds[order]
+        
+        # Flips alternate per combination starting with "away", so each away
+        # flip ends at the next flip of the same combination (or the end)
+        starts = np.flatnonzero(kinds)
+        following = np.minimum(starts + 1, len(combos) - 1)
+        ends = np.where((starts + 1 < len(combos)) & (combos[following] == combos[starts]), frames[following], n)
+        np.add.at(stats["away_time"], combos[starts], cum_all[ends] - cum_all[frames[starts]])
+        np.add.at(stats["overlap"], combos[starts], cum_away[ends] - cum_away[frames[starts]])
+        
+        times = t[frames]
+        bounds = np.flatnonzero(np.diff(combos)) + 1
+        for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(combos)]))):
+            c = combos[lo]
+            went, came = times[lo:hi][kinds[lo:hi]], times[lo:hi][~kinds[lo:hi]]
+            m1, l1 = self._match(went, labeled_away, tolerance)
+            m2, l2 = self._match(came, labeled_returns, tolerance)
+            stats["predicted"][c] = hi - lo
+            stats["matched"][c] = m1 + m2
+            stats["latency"][c] = l1 + l2
+        return stats
+
+
+# Pool task for run_tune: one slice of the motion thresholds over one trace
+def _sweep_chunk(grid, thresholds, trace, tolerance):
+    sweep = PresenceSweep(grid["confs"], thresholds, grid["absence"], grid["presence"], grid["decrement"],
+                          grid["score_max"], grid["increment"], grid["score_decrement"])
+    return sweep.run(*trace, tolerance)
+
+
+# PIPELINE
+
+# Fixed-size ring of frame slots in shared memory. Processes only pass slot
+# numbers over queues and read / write the frames in place, so a frame is
+# never pickled or copied on its way from the camera to the model.
+class FrameRing:
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.owner = name is None
+        size = slots * int(np.prod(self.shape))
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+    
+    @property
+    def name(self):
+        return self.shm.name
+    
+    def close(self):
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Something still holds a frame view (e.g. the last results); the
+            # mapping goes away with it
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+
+# Capture process: owns the camera. Reports the frame size so the coordinator
+# can size the ring, then reads each frame straight into a free slot, runs the
+# motion check and the inference policy, and sends the slot either to the
+# workers or (inference skipped) directly back to the coordinator. Messages
+# are (epoch, seq, slot, time, motion, boxes, full frame).
+def _pipeline_capture(source, config, slots, block, shared):
+    _limit_threads(1)
+    cap = cv2.VideoCapture(source)
+    ok, frame = cap.read() if cap.isOpened() else (False, None)
+    if not ok:
+        cap.release()
+        shared["done"].put(("capture_failed",))
+        return
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    
+    shared["done"].put(("shape", frame.shape))
+    ring_name = shared["setup"].get()
+    if ring_name is None:
+        cap.release()
+        return
+    ring = FrameRing(slots, frame.shape, ring_name)
+    height, width = frame.shape[:2]
+    
+    motion = MotionDetector(config.MOTION_PIXEL_THRESHOLD, config.MOTION_WIDTH, config.MOTION_MODE)
+    scheduler = InferenceScheduler(config.INFERENCE_POLICY, config.KEEPALIVE_FRAMES,
+                                   config.KEEPALIVE_MS, config.PHONE_RETRIGGER)
+    
+    # A camera that stopped delivering is reopened (up to CAPTURE_MAX_STALLS
+    # tries) instead of ending the session; a file that ran out is just done
+    def reopen():
+        nonlocal cap
+        if block:
+            return False
+        for attempt in range(config.CAPTURE_MAX_STALLS):
+            cap.release()
+            if attempt:
+                time.sleep(config.CAPTURE_READ_TIMEOUT)
+            cap = cv2.VideoCapture(source)
+            shared["reopens"].value += 1
+            if cap.isOpened() and cap.grab():
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                return True
+        return False
+
+    state, epoch, interval = shared["state"], shared["epoch"], shared["interval"]
+    free_slots, tasks, done = shared["free"], shared["tasks"], shared["done"]
+    current_epoch = None
+    last_decode = 0.0
+    seq = 0
+    
+    while state.value != ProcessPipeline.STOPPING:
+        if state.value == ProcessPipeline.SUSPENDED:
+            # Same as FrameGrabber.suspend(): keep streaming, skip decoding,
+            # paced at the set rate. Files just wait, grabbing would skip
+            # through them.
+            if block:
+                time.sleep(0.01)
+                continue
+            deadline = time.time() + interval.value
+            while state.value == ProcessPipeline.SUSPENDED and time.time() < deadline:
+                time.sleep(0.05)
+            if not cap.grab() and not reopen():
+                break
+            continue
+        
+        if epoch.value != current_epoch:
+            current_epoch = epoch.value
+            seq = 0
+            last_decode = 0.0
+            motion.reset()
+            scheduler.reset()
+            # Drop the frames left in the driver queue while suspended
+            if not block and interval.value and not FrameGrabber.drain(cap) and not reopen():
+                break
+        
+        # Cameras: grab every frame, decode only when due (FrameGrabber.set_rate)
+        if not block:
+            if not cap.grab() and not reopen():
+                break
+            if time.time() < last_decode + interval.value - FrameGrabber.RATE_SLACK:
+                continue
+        
+        try:
+            slot = free_slots.get(timeout=config.CAPTURE_READ_TIMEOUT) if block else free_slots.get_nowait()
+        except queue.Empty:
+            if block:
+                continue
+            # Ring full, analysis is behind: drop at the source
+            shared["dropped"].value += 1
+            continue
+        
+        buf = ring.frames[slot]
+        ok, frame = cap.read(buf) if block else cap.retrieve(buf)
+        now = last_decode = time.time()
+        if not ok:
+            free_slots.put(slot)
+            if reopen():
+                continue
+            break
+        if frame is not buf:
+            # Driver changed resolution; the ring keeps the original one
+            cv2.resize(frame, (width, height), dst=buf)
+        shared["captured"].value += 1
+        
+        moved = motion.detect(buf)
+        scheduler.last_phone = bool(shared["phone_seen"].value)
+        run = scheduler.should_run(moved, now)
+        scheduler.accept((None, False, False) if run else None, now)
+        
+        message = (current_epoch, seq, slot, now, moved)
+        if run:
+            tasks.put(message)
+        else:
+            done.put(message + (None, True))
+        seq += 1
+    
+    for _ in range(shared["workers"]):
+        tasks.put(None)
+    done.put(("capture_done",))
+    cap.release()
+    ring.close()
+
+
+# Inference worker: runs YOLO on ring slots and sends back the raw boxes and
+# whether they came from a full-frame pass. In ROI mode every worker keeps its
+# own PersonROI, fed by the frames it gets. Reports the model's class names
+# when ready, for the coordinator's results.
+def _pipeline_worker(config, slots, ring_name, shape, threads, shared):
+    _limit_threads(threads)
+    ring = FrameRing(slots, shape, ring_name)
+    detector = YOLODetector.from_config(config, roi=PersonROI.from_config(config))
+    shared["done"].put(("worker_ready", detector.model.names))
+    
+    while True:
+        message = shared["tasks"].get()
+        if message is None:
+            break
+        full_passes = detector.full_passes
+        results, _, _ = detector.analyze(ring.frames[message[2]], message[3])
+        shared["done"].put(message + (results[0].boxes.data.cpu().numpy(), detector.full_passes > full_passes))
+    
+    shared["done"].put(("worker_done",))
+    ring.close()
+
+
+# Multi-process stand-in for FrameGrabber (same start / read / suspend /
+# resume / stop interface): capture and YOLO run in their own processes and
+# this side, the coordinator, gets frames back in capture order with their
+# detections in self.detection = (motion, boxes or None, full frame). A
+# frame's slot is handed back when the next one is read, so the ring size
+# bounds the frames in flight; when it's full the capture process drops frames
+# at the camera (or waits, for video files).
+class ProcessPipeline:
+    ACTIVE, SUSPENDED, STOPPING = 0, 1, 2
+    
+    def __init__(self, source, config, block=None):
+        self.source = source
+        self.config = config
+        self.workers = max(1, config.PIPELINE_WORKERS)
+        self.slots = config.PIPELINE_SLOTS or self.workers * 2 + 2
+        self.block = isinstance(source, str) if block is None else block
+        self.read_timeout = config.CAPTURE_READ_TIMEOUT
+        
+        # spawn: forking a process that already has torch / Tk threads running isn't safe
+        self.ctx = multiprocessing.get_context("spawn")
+        self.shared = {
+            "state": self.ctx.RawValue("i", self.SUSPENDED),
+            "epoch": self.ctx.RawValue("i", 0),
+            "phone_seen": self.ctx.RawValue("b", 0),
+            "interval": self.ctx.RawValue("d", 0.0),
+            "captured": self.ctx.RawValue("q", 0),
+            "dropped": self.ctx.RawValue("q", 0),
+            "reopens": self.ctx.RawValue("q", 0),
+            "free": self.ctx.Queue(),
+            "tasks": self.ctx.Queue(),
+            "done": self.ctx.Queue(),
+            "setup": self.ctx.Queue(),
+            "workers": self.workers,
+        }
+        self.phone_seen = self.shared["phone_seen"]
+        self.names = None
+        self.processes = []
+        self.ring = None
+        self.pending = {}
+        self.next_seq = 0
+        self.held_slot = None
+        self.detection = None
+        self.running = False
+        self.suspended = False
+        self.workers_done = 0
+        self.last_frame_time = None
+        self.reset_stats()
+    
+    def start(self):
+        capture = self.ctx.Process(target=_pipeline_capture, daemon=True,
+                                   args=(self.source, self.config, self.slots, self.block, self.shared))
+        capture.start()
+        self.processes.append(capture)
+        
+        message = self._wait_for(("shape", "capture_failed"))
+        if message is None or message[0] != "shape":
+            self.shared["setup"].put(None)
+            self.stop()
+            return False
+        shape = message[1]
+        self.ring = FrameRing(self.slots, shape)
+        self.shared["setup"].put(self.ring.name)
+        
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        for _ in range(self.workers):
+            worker = self.ctx.Process(target=_pipeline_worker, daemon=True,
+                                      args=(self.config, self.slots, self.ring.name, shape, threads, self.shared))
+            worker.start()
+            self.processes.append(worker)
+        
+        # Every worker has its model loaded before the first frame goes out
+        for _ in range(self.workers):
+            message = self._wait_for(("worker_ready",))
+            if message is None:
+                self.stop()
+                return False
+            self.names = message[1]
+        
+        for slot in range(self.slots):
+            self.shared["free"].put(slot)
+        self.running = True
+        self.resume()
+        return True
     
-    def __init__(self):
-        self.log_data = []
+    def _wait_for(self, kinds):
+        deadline = time.time() + self.config.PIPELINE_START_TIMEOUT
+        while time.time() < deadline:
+            try:
+                message = self.shared["done"].get(timeout=1.0)
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.processes):
+                    return None
+                continue
+            if message[0] in kinds:
+                return message
+        return None
+    
+    def _receive(self, message):
+        kind = message[0]
+        if kind == "capture_done":
+            self.running = False
+        elif kind == "worker_done":
+            self.workers_done += 1
+        elif isinstance(kind, str):
+            pass
+        elif kind != self.shared["epoch"].value:
+            # In flight when the pipeline was suspended
+            self.shared["free"].put(message[2])
+        else:
+            self.pending[message[1]] = message
     
-    def log(self, source, message):
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        color = self.COLORS.get(source, self.COLORS["Camera"])
+    def read(self):
+        if self.held_slot is not None:
+            self.shared["free"].put(self.held_slot)
+            self.held_slot = None
         
-        print(f"{color}[{timestamp}] [{source}] {message}{self.RESET}")
+        stalls = 0
+        while self.next_seq not in self.pending:
+            if self.workers_done == self.workers:
+                return False, None
+            try:
+                message = self.shared["done"].get(timeout=self.read_timeout)
+            except queue.Empty:
+                # Same tolerance as FrameGrabber: the capture process reopens
+                # a camera that stopped delivering, so only repeated stalls
+                # (or a dead process) end the session
+                stalls += 1
+                self.stalls += 1
+                if stalls >= self.config.CAPTURE_MAX_STALLS or not all(p.is_alive() for p in self.processes):
+                    return False, None
+                continue
+            self._receive(message)
         
-        self.log_data.append({
-            "time": timestamp,
-            "source": source,
-            "message": message
-        })
+        _, _, slot, frame_time, moved, boxes, full_frame = self.pending.pop(self.next_seq)
+        self.next_seq += 1
+        self.held_slot = slot
+        self.detection = (moved, boxes, full_frame)
+        self.last_frame_time = frame_time
+        self.analysis_rate.tick()
+        return True, self.ring.frames[slot]
     
-    def clear(self):
-        self.log_data = []
+    def suspend(self):
+        self.shared["state"].value = self.SUSPENDED
+        self.suspended = True
+    
+    def set_rate(self, fps):
+        self.shared["interval"].value = 1.0 / fps if fps else 0.0
+    
+    def resume(self):
+        if not self.running or not self.processes[0].is_alive():
+            return False
+        if self.held_slot is not None:
+            self.shared["free"].put(self.held_slot)
+            self.held_slot = None
+        for message in self.pending.values():
+            self.shared["free"].put(message[2])
+        self.pending.clear()
+        
+        # Anything still in flight from before belongs to the old epoch
+        self.shared["epoch"].value += 1
+        self.next_seq = 0
+        self.reset_stats()
+        self.suspended = False
+        self.shared["state"].value = self.ACTIVE
+        return True
+    
+    def stop(self):
+        self.shared["state"].value = self.STOPPING
+        self.running = False
+        
+        # Keep draining so workers never block on a full pipe while finishing
+        started = len(self.processes) - 1
+        deadline = time.time() + self.read_timeout + 5.0
+        while self.workers_done < started and time.time() < deadline:
+            try:
+                self._receive(self.shared["done"].get(timeout=0.1))
+            except queue.Empty:
+                pass
+        
+        for process in self.processes:
+            process.join(timeout=max(0.1, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+        
+        self.pending.clear()
+        self.held_slot = None
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+    
+    def reset_stats(self):
+        self.analysis_rate = RateCounter()
+        self.stats_since = time.time()
+        self.captured_base = self.shared["captured"].value
+        self.dropped_base = self.shared["dropped"].value
+        self.reopens_base = self.shared["reopens"].value
+        self.stalls = 0
+    
+    @property
+    def frames_read(self):
+        return self.shared["captured"].value - self.captured_base
+    
+    @property
+    def frames_dropped(self):
+        return self.shared["dropped"].value - self.dropped_base
+    
+    @property
+    def buffer(self):
+        return self.pending
+    
+    def stats(self):
+        elapsed = time.time() - self.stats_since
+        return {
+            "capture_fps": (self.frames_read + self.frames_dropped) / elapsed if elapsed > 0 else 0.0,
+            "analysis_fps": self.analysis_rate.rate(),
+            "frames_read": self.frames_read,
+            "frames_analyzed": self.analysis_rate.count,
+            "frames_dropped": self.frames_dropped,
+        }
+    
+    def summary(self):
+        s = self.stats()
+        reopens = self.shared["reopens"].value - self.reopens_base
+        stalls = f", {self.stalls} stalls / {reopens} reopens" if self.stalls or reopens else ""
+        return (f"Capture {s['capture_fps']:.1f} FPS / Analysis {s['analysis_fps']:.1f} FPS, "
+                f"{s['frames_dropped']}/{s['frames_read'] + s['frames_dropped']} frames dropped at the camera, "
+                f"{self.workers} inference workers{stalls}")
 
 
-class ReportGenerator:    
-    @staticmethod
-    def generate(log_data, start_time, end_time, output_file):
+# INFERENCE SERVICE
 
-        if not start_time:
-            return
+# An error reply from InferenceServer. It's an OSError so callers treat it like
+# a lost server: the client reconnects once, then YOLODetector loads the model
+# locally.
+class InferenceServerError(OSError):
+    pass
+
+
+# Client side of InferenceServer. YOLODetector calls it like a local model
+# (same arguments, ultralytics Results back). Frames are copied into a
+# shared-memory segment this client owns and only their offsets and shapes go
+# over the socket, along with the box rows coming back.
+class InferenceClient:
+    def __init__(self, path, timeout):
+        # Imported up front so the first frame doesn't pay for it
+        from ultralytics.engine.results import Results
         
-        if not end_time:
-            end_time = datetime.datetime.now()
+        self.path = path
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+        self.shm = None
+        self.names = {}
+        self.requests = 0
+        self._connect()
+        # Runs at exit in the main process and in pool / pipeline workers,
+        # which skip atexit
+        multiprocessing.util.Finalize(None, self.close, exitpriority=0)
+    
+    # Opens the connection and (re)attaches the segment, if there is one
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock, self.reader = sock, sock.makefile("rb")
+        try:
+            self.names = {int(k): v for k, v in self._call({"op": "hello"})["names"].items()}
+            if self.shm is not None:
+                self._call({"op": "attach", "name": self.shm.name})
+        except OSError:
+            self._disconnect()
+            raise
+    
+    def _call(self, message):
+        self.sock.sendall(json.dumps(message).encode() + b"\n")
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("inference server closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise InferenceServerError(f"inference server: {reply['error']}")
+        return reply
+    
+    # Grows the segment (by doubling) until the frames fit; True when it's a
+    # new segment the server still has to attach
+    def _reserve(self, size):
+        if self.shm is not None and self.shm.size >= size:
+            return False
+        capacity = max(size, 2 * self.shm.size if self.shm is not None else 0)
+        self._release()
+        self.shm = shared_memory.SharedMemory(create=True, size=capacity)
+        return True
+    
+    # A failed call (including an error reply) leaves the client disconnected
+    # and raises OSError; the next call connects again
+    def __call__(self, source, verbose=False, classes=None, imgsz=640):
+        import torch
+        from ultralytics.engine.results import Results
         
-        duration = end_time - start_time
+        frames = source if isinstance(source, list) else [source]
+        grown = self._reserve(sum(frame.nbytes for frame in frames))
+        layout, offset = [], 0
+        for frame in frames:
+            np.ndarray(frame.shape, np.uint8, buffer=self.shm.buf, offset=offset)[...] = frame
+            layout.append([offset, list(frame.shape)])
+            offset += frame.nbytes
         
-        html = f"""
-        <html>
-        <head>
-            <title>FocusFrame Report</title>
-            <style>
-                body {{ font-family: monospace; padding: 20px; background: #f5f5f5; }}
-                h1 {{ color: #333; }}
-                table {{ border-collapse: collapse; width: 100%; background: white; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #4CAF50; color: white; }}
-                tr:nth-child(even) {{ background-color: #f9f9f9; }}
-                .distraction {{ color: red; font-weight: bold; }}
-                .camera {{ color: green; }}
-                .system {{ color: blue; }}
-            </style>
-        </head>
-        <body>
-            <h1>FocusFrame Session Report</h1>
-            <p><strong>Duration:</strong> {str(duration).split('.')[0]}</p>
-            <table>
-                <tr><th>Time</th><th>Type</th><th>Message</th></tr>
-        """
-        
-        for entry in log_data:
-            source = entry['source']
-            cls = source.lower()
-            html += f"<tr class='{cls}'><td>{entry['time']}</td><td>{source}</td><td>{entry['message']}</td></tr>"
-        
-        html += """
-            </table>
-        </body>
-        </html>
-        """
+        request = {"op": "infer", "frames": layout, "classes": classes, "imgsz": imgsz}
+        try:
+            if self.sock is None:
+                self._connect()
+            elif grown:
+                self._call({"op": "attach", "name": self.shm.name})
+            reply = self._call(request)
+        except OSError:
+            # Server restarted or stalled: reconnect once and resend
+            self._disconnect()
+            self._connect()
+            try:
+                reply = self._call(request)
+            except OSError:
+                self._disconnect()
+                raise
+        self.requests += 1
         
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html)
+        return [Results(frame, path="", names=self.names,
+                        boxes=torch.tensor(rows, dtype=torch.float32).reshape(-1, 6))
+                for frame, rows in zip(frames, reply["boxes"])]
+    
+    def _disconnect(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+            self.sock = None
+    
+    def _release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+    
+    def close(self):
+        self._disconnect()
+        self._release()
+
+
+# Local inference daemon: one model shared by every FocusFrame on the machine
+# (python focus_frame.py serve). Each connection gets a reader thread that
+# queues its requests; the batching loop takes the oldest one and keeps
+# collecting until max_batch frames are waiting or it has waited max_latency
+# seconds, then runs them all through the model in one call per input size.
+# Protocol: JSON lines. hello -> class names; attach -> map the client's
+# shared-memory segment; infer (frame offsets / shapes) -> box rows per frame.
+class InferenceServer:
+    def __init__(self, config, path, max_batch, max_latency):
+        self.config = copy.copy(config)
+        self.config.INFERENCE_SERVER = None
+        self.path = path
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max_latency
+        self.detector = YOLODetector.from_config(self.config)
+        self.requests = queue.Queue()
+        self.clients = set()
+        self.connections = 0
+        self.batches = 0
+        self.frames = 0
+        self.model_calls = 0
+        self.served = 0
+        self.wait_total = 0.0
+    
+    def serve(self):
+        if os.path.exists(self.path):
+            # Only replace a stale socket, never a live server
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise RuntimeError(f"An inference server is already listening on {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.path)
+            finally:
+                probe.close()
         
-        webbrowser.open('file://' + os.path.abspath(output_file))
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        listener.listen()
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+        print(f">>> {Config.APP_NAME}: INFERENCE SERVER listening on {self.path} "
+              f"(batch <= {self.max_batch}, wait <= {self.max_latency * 1000:.0f} ms)")
+        
+        try:
+            while True:
+                self._run_batch(self._collect())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            print(f"   {self.summary()}")
+    
+    def _accept(self, listener):
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+    
+    def _serve_client(self, conn):
+        client = {"conn": conn, "shm": None}
+        self.clients.add(id(client))
+        self.connections += 1
+        try:
+            for line in conn.makefile("rb"):
+                message = json.loads(line)
+                op = message.get("op")
+                if op == "infer":
+                    self.requests.put((time.perf_counter(), client, message))
+                elif op == "hello":
+                    self._reply(client, {"names": self.detector.model.names})
+                elif op == "attach":
+                    # The client only attaches between requests, so nothing
+                    # queued still points at the old segment
+                    self._detach(client)
+                    client["shm"] = self._attach(message["name"])
+                    self._reply(client, {"ok": True})
+                else:
+                    self._reply(client, {"error": f"unknown op {op!r}"})
+        except (OSError, ValueError):
+            pass
+        # Let the batching loop close the segment once it's done with it
+        self.requests.put((time.perf_counter(), client, None))
+    
+    @staticmethod
+    def _attach(name):
+        shm = shared_memory.SharedMemory(name=name)
+        # Opening a segment registers it with the resource tracker, which would
+        # unlink the client's segment when this process exits
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+    
+    @staticmethod
+    def _detach(client):
+        if client["shm"] is not None:
+            try:
+                client["shm"].close()
+            except BufferError:
+                pass
+            client["shm"] = None
+    
+    @staticmethod
+    def _reply(client, message):
+        try:
+            client["conn"].sendall(json.dumps(message).encode() + b"\n")
+        except OSError:
+            pass
+    
+    # The oldest request plus whatever arrives before its wait budget runs out.
+    # A client has at most one request in flight, so once every connected
+    # client is in the batch there's nothing left to wait for.
+    def _collect(self):
+        batch = [self.requests.get()]
+        deadline = batch[0][0] + self.max_latency
+        frames = len(batch[0][2]["frames"]) if batch[0][2] is not None else 0
+        while frames < self.max_batch and len(batch) < len(self.clients):
+            try:
+                request = self.requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            batch.append(request)
+            if request[2] is not None:
+                frames += len(request[2]["frames"])
+        return batch
+    
+    def _run_batch(self, batch):
+        boxes, errors = self._infer(batch)
+        for arrived, client, message in batch:
+            if message is None:
+                self._detach(client)
+                client["conn"].close()
+                self.clients.discard(id(client))
+            elif client["shm"] is None:
+                self._reply(client, {"error": "no shared memory attached"})
+            else:
+                key = (message["imgsz"], tuple(message["classes"] or ()))
+                if key in errors:
+                    self._reply(client, {"error": errors[key]})
+                else:
+                    self._reply(client, {"boxes": [next(boxes[key]) for _ in message["frames"]]})
+    
+    # Box rows per frame, in request order, for each (imgsz, classes) group.
+    # The frame views into the clients' segments don't outlive this call.
+    def _infer(self, batch):
+        started = time.perf_counter()
+        groups = {}
+        for arrived, client, message in batch:
+            if message is None or client["shm"] is None:
+                continue
+            self.wait_total += started - arrived
+            self.served += 1
+            key = (message["imgsz"], tuple(message["classes"] or ()))
+            for offset, shape in message["frames"]:
+                frame = np.ndarray(shape, np.uint8, buffer=client["shm"].buf, offset=offset)
+                groups.setdefault(key, []).append(frame)
+        
+        boxes, errors = {}, {}
+        for key, frames in groups.items():
+            try:
+                results = self.detector.predict(frames, key[0], list(key[1]) or None)
+                boxes[key] = iter([r.boxes.data.cpu().numpy().tolist() for r in results])
+            except Exception as e:
+                errors[key] = str(e)
+            self.model_calls += 1
+            self.frames += len(frames)
+        if groups:
+            self.batches += 1
+        return boxes, errors
+    
+    def summary(self):
+        served = self.batches or 1
+        return (f"{self.connections} clients served, {self.frames} frames in {self.batches} batches "
+                f"({self.frames / served:.1f} per batch, {self.model_calls} model calls), "
+                f"mean queue wait {1000 * self.wait_total / (self.served or 1):.1f} ms")
 
 
 # MAIN ENGINE
 
 class FocusFrameEngine:    
-    def __init__(self, config=None):
+    def __init__(self, config=None, interactive=True, detector=None):
         self.config = config or Config()
+        self.interactive = interactive
         self.is_monitoring = False
         self.start_time = None
         self.end_time = None
         
-        # Components
+        # Components (the detector can be shared, see MultiSourceMonitor).
+        # Interactively the model loads and warms up in the background so the
+        # hotkeys and the Pomodoro prompt are live right away; until it's
+        # ready, presence runs on motion alone.
         self.presence_detector = PresenceDetector(self.config)
-        self.yolo_detector = YOLODetector(
-            self.config.MODEL_NAME,
-            [self.config.CLASS_PERSON, self.config.CLASS_PHONE],
-            self.config.CONF_THRESHOLD
+        self.yolo_detector = detector
+        self.model_thread = None
+        self.model_load_time = None
+        if detector is None and interactive:
+            self.model_thread = threading.Thread(target=self._load_model, daemon=True)
+            self.model_thread.start()
+        elif detector is None:
+            self._load_model()
+        self.scheduler = InferenceScheduler(
+            self.config.INFERENCE_POLICY,
+            self.config.KEEPALIVE_FRAMES,
+            self.config.KEEPALIVE_MS,
+            self.config.PHONE_RETRIGGER,
+            ResultCache(
+                self.config.RESULT_CACHE_SIZE,
+                self.config.RESULT_CACHE_MAX_DIFF,
+                self.config.RESULT_CACHE_MAX_AGE
+            ) if self.config.RESULT_CACHE_ENABLED else None
         )
-        self.distraction_monitor = DistractionMonitor(self.config.DISTRACTION_KEYWORDS)
+        self.tracker = BoxTracker(
+            self.config.TRACKER_SCALE,
+            self.config.TRACKER_HALF_LIFE,
+            self.config.TRACKER_MIN_CONFIDENCE
+        ) if self.config.TRACKER_ENABLED else None
+        
+        # Replay has no desktop to watch and nobody to show popups / previews to
+        self.distraction_monitor = DistractionMonitor(
+            self.config.DISTRACTION_KEYWORDS,
+            DistractionRules.load(self.config.DISTRACTION_RULES_FILE, self.config.DISTRACTION_KEYWORDS)
+            if self.config.DISTRACTION_RULES_FILE else None,
+            self.config.WINDOW_POLL_INTERVAL
+        ) if interactive else None
         self.phone_popup = PhonePopup()
-        self.logger = EventLogger()
+        self.preview = None if self.config.HEADLESS or not interactive else PreviewRenderer(self.config.PREVIEW_FPS)
+        self.logger = EventLogger(
+            echo=interactive,
+            journal_dir=self.config.SESSION_DIR,
+            tail_size=self.config.LOG_TAIL_SIZE,
+            fsync_interval=self.config.LOG_FSYNC_INTERVAL
+        )
+        # Live capture only: replay analyzes every frame of the recording
+        self.governor = FrameRateGovernor(
+            self.config.FPS_PRESENT,
+            self.config.FPS_AWAY,
+            self.config.FPS_PHONE,
+            self.config.FPS_BREAK,
+            self.config.FPS_MIN,
+            self.config.FPS_MAX,
+            self.config.GOVERNOR_CPU_BUDGET,
+            self.config.GOVERNOR_LOAD_HIGH
+        ) if interactive and self.config.GOVERNOR_ENABLED else None
+        self.intervals = IntervalLog()
+        self.clips = ClipRecorder(
+            self.config.CLIP_DIR,
+            self.config.CLIP_PRE_SECONDS,
+            self.config.CLIP_POST_SECONDS,
+            self.config.CLIP_FPS,
+            self.config.CLIP_WIDTH,
+            self.config.CLIP_QUOTA_MB,
+            self.config.ABSENCE_TIME
+        ) if self.config.CLIPS_ENABLED else None
+        self.source = None
+        self.trace = None
+        self.session_thread = None
+        self.start_requested = None
+        self.camera = CameraManager(
+            self._make_grabber,
+            self.config.CAMERA_IDLE_TIMEOUT
+        ) if interactive else None
+        # Pipeline workers take seconds to spawn and load their models, so that
+        # mode always starts at launch. Like the model, the camera / pipeline
+        # comes up in the background; the first session waits for it.
+        self.camera_thread = None
+        if self.camera is not None and (self.config.CAMERA_PREOPEN or self.config.PIPELINE_WORKERS > 0):
+            self.camera_thread = threading.Thread(target=self._warm_camera, daemon=True)
+            self.camera_thread.start()
+        self.store = SessionStore(self.config.HISTORY_DB) if interactive and self.config.HISTORY_DB else None
+        
+        # Metrics (no-op unless an exporter is configured)
+        metrics_on = interactive and (self.config.METRICS_PORT or self.config.METRICS_FILE)
+        self.metrics = Metrics() if metrics_on else NullMetrics()
+        self.metrics_exporter = None
+        if metrics_on:
+            self._register_gauges()
+            self.metrics_exporter = MetricsExporter(
+                self.metrics,
+                self.config.METRICS_PORT,
+                self.config.METRICS_FILE,
+                self.config.METRICS_INTERVAL
+            )
+            self.metrics_exporter.start()
         
         # Pomodoro settings
         self.pomodoro_enabled = False
@@ -319,6 +4014,47 @@ class FocusFrameEngine:
         self.pomodoro_break_min = 5
         self.pomodoro_cycles = 4
     
+    # In pipeline mode the workers load the model and do the ROI cropping;
+    # the coordinator's detector has neither
+    def _load_model(self):
+        started = time.perf_counter()
+        pipeline = self.interactive and self.config.PIPELINE_WORKERS > 0
+        try:
+            detector = YOLODetector.from_config(
+                self.config,
+                roi=None if pipeline else PersonROI.from_config(self.config),
+                load=not pipeline
+            )
+        except Exception as e:
+            if not self.interactive:
+                raise
+            print(f">>> {self.config.APP_NAME}: ERROR: Could not load the AI model ({e}). Running on motion only.")
+            return
+        self.model_load_time = time.perf_counter() - started
+        self.yolo_detector = detector
+        if self.is_monitoring:
+            self.logger.log("System", f"AI model ready after {self.model_load_time:.1f}s, person / phone detection on")
+        elif self.interactive:
+            print(f">>> {self.config.APP_NAME}: AI MODEL READY ({self.model_load_time:.1f}s)")
+    
+    # A failure isn't reported here: the session's _open_camera tries again
+    # and says so
+    def _warm_camera(self):
+        started = time.perf_counter()
+        if not self.camera.warm() or self.config.PIPELINE_WORKERS <= 0:
+            return
+        elapsed = time.perf_counter() - started
+        if self.is_monitoring:
+            self.logger.log("System", f"Inference pipeline ready after {elapsed:.1f}s")
+        else:
+            print(f">>> {self.config.APP_NAME}: INFERENCE PIPELINE READY ({elapsed:.1f}s)")
+    
+    # True once the model is loaded (waits up to timeout seconds for it)
+    def wait_for_model(self, timeout=None):
+        if self.model_thread is not None:
+            self.model_thread.join(timeout)
+        return self.yolo_detector is not None
+    
     def print_banner(self):
         print("\n" + "="*60)
         print(f"   {self.config.APP_NAME} - READY")
@@ -335,21 +4071,77 @@ class FocusFrameEngine:
             print(f"   [POMODORO ACTIVE] {self.pomodoro_work_min}m work / {self.pomodoro_break_min}m break x {self.pomodoro_cycles} cycles")
         else:
             print("   [POMODORO OFF] Press hotkey to start manual session")
+        if self.yolo_detector is None:
+            print("   [AI MODEL LOADING] Sessions run on motion only until it's ready")
+        if self.config.PIPELINE_WORKERS > 0 and self.camera_thread is not None and self.camera_thread.is_alive():
+            print("   [PIPELINE STARTING] The first session starts once the workers are ready")
         print("="*60 + "\n")
     
     def start_session(self):
-        if self.is_monitoring:
+        # A stopped session may still be writing its report
+        if self.is_monitoring or self.session_thread is not None:
             return
         
         self.is_monitoring = True
+        self.start_requested = time.perf_counter()
         self.start_time = datetime.datetime.now()
-        self.logger.clear()
-        self.presence_detector.reset()
+        self._reset_components()
+        self.logger.start_session(self.start_time)
         
-        if self.pomodoro_enabled:
-            threading.Thread(target=self._run_pomodoro, daemon=True).start()
-        else:
-            threading.Thread(target=self._run_monitoring, daemon=True).start()
+        target = self._run_pomodoro if self.pomodoro_enabled else self._run_monitoring
+        self.session_thread = threading.Thread(target=target, daemon=True)
+        self.session_thread.start()
+    
+    def _register_gauges(self):
+        m = self.metrics
+        m.register_gauge("frames_read", lambda: self.source.frames_read, "counter")
+        m.register_gauge("frames_dropped", lambda: getattr(self.source, "frames_dropped", 0), "counter")
+        m.register_gauge("inferences", lambda: self.scheduler.inferences, "counter")
+        m.register_gauge("inferences_skipped", lambda: self.scheduler.skipped, "counter")
+        if self.scheduler.cache is not None:
+            m.register_gauge("result_cache_hits", lambda: self.scheduler.cache.hits, "counter")
+            m.register_gauge("result_cache_misses", lambda: self.scheduler.cache.misses, "counter")
+            m.register_gauge("result_cache_hit_rate", lambda: self.scheduler.cache.hit_rate())
+        m.register_gauge("capture_queue_depth", lambda: len(getattr(self.source, "buffer", ())))
+        m.register_gauge("preview_queue_depth", lambda: int(self.preview is not None and self.preview.pending is not None))
+        m.register_gauge("capture_fps", lambda: self.source.stats()["capture_fps"])
+        m.register_gauge("analysis_fps", lambda: self.source.stats()["analysis_fps"])
+        m.register_gauge("presence_score", lambda: self.presence_detector.score)
+        m.register_gauge("away", lambda: int(self.presence_detector.is_away))
+        if self.governor is not None:
+            m.register_gauge("target_fps", lambda: self.governor.fps)
+            m.register_gauge("cpu_seconds", lambda: self.governor.cpu_seconds(), "counter")
+    
+    def _reset_components(self, current_time=None):
+        self.logger.clear()
+        self.presence_detector.reset(current_time)
+        self.scheduler.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+        if self.yolo_detector is not None and self.yolo_detector.roi is not None:
+            self.yolo_detector.roi.reset()
+        if self.governor is not None:
+            self.governor.reset()
+    
+    # Runs a session on a source other than the webcam, on the source's clock
+    def attach(self, source, start_epoch, name=None):
+        self.source = source
+        self.logger.clock = lambda: source.last_frame_time
+        self.is_monitoring = True
+        self.start_time = datetime.datetime.fromtimestamp(start_epoch)
+        self._reset_components(start_epoch)
+        self.logger.start_session(self.start_time, name)
+    
+    def detach(self):
+        self.is_monitoring = False
+        self.end_time = datetime.datetime.fromtimestamp(self.source.last_frame_time)
+        self.logger.end_session(self.end_time)
+    
+    def replay(self, source, name=None):
+        name = name or os.path.splitext(os.path.basename(os.path.normpath(source.path)))[0]
+        self.attach(source, source.start_epoch, name)
+        self._run_monitoring(source)
+        self.detach()
     
     def stop_session(self):
         if not self.is_monitoring:
@@ -357,58 +4149,222 @@ class FocusFrameEngine:
         
         self.is_monitoring = False
         self.end_time = datetime.datetime.now()
-        time.sleep(1)
+        # Called on the hotkey listener's thread, which mustn't block while
+        # the loop winds down and the report is written
+        threading.Thread(target=self._finish_session, daemon=True).start()
+    
+    def _finish_session(self):
+        # Let the loop log its closing stats before the journal is closed
+        if self.session_thread is not None:
+            self.session_thread.join()
         self._generate_report()
     
-    def _run_monitoring(self):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            print("ERROR: Could not open camera (Index 0).")
-            return
+    def _make_grabber(self):
+        if self.config.PIPELINE_WORKERS > 0:
+            return ProcessPipeline(self.config.CAMERA_INDEX, self.config)
+        return FrameGrabber(
+            self.config.CAMERA_INDEX,
+            self.config.CAPTURE_BUFFER_SIZE,
+            self.config.CAPTURE_READ_TIMEOUT,
+            self.config.CAPTURE_MAX_STALLS
+        )
+    
+    def _open_camera(self):
+        # Joined before acquiring, so the warm-up's suspend can't land on
+        # the session's grabber
+        if self.camera_thread is not None:
+            if self.camera_thread.is_alive():
+                print(f">>> {self.config.APP_NAME}: Waiting for the camera / inference pipeline to start...")
+            self.camera_thread.join()
+            self.camera_thread = None
+        grabber = self.camera.acquire()
+        if grabber is None:
+            print(f"ERROR: Could not open camera (Index {self.config.CAMERA_INDEX}).")
+            return None
+        if self.preview is not None:
+            self.preview.start()
+        if self.distraction_monitor is not None:
+            self.distraction_monitor.start()
+        self.source = grabber
+        return grabber
+    
+    # Between Pomodoro work periods the camera is only suspended; at the end of
+    # a session it's released to the manager's idle timer. Replay sources stop.
+    # A suspended camera is grabbed at the governor's break rate.
+    def _close_camera(self, grabber):
+        # Distractions still going on end with the camera period, and so do
+        # the post-event windows of their clips
+        for _, _, _, duration, entry in self.intervals.close_all():
+            self.logger.close_interval(entry, duration)
+        if self.clips is not None:
+            self.clips.flush()
+        
+        if self.camera is None or grabber is not self.camera.grabber:
+            grabber.stop()
+        else:
+            if self.governor is not None:
+                grabber.set_rate(self.governor.break_fps)
+            if self.is_monitoring:
+                self.camera.suspend()
+            else:
+                self.camera.release()
+        if self.distraction_monitor is not None:
+            self.distraction_monitor.stop()
+        if self.preview is not None:
+            self.preview.stop()
+        self.logger.log("System", f"Camera stats: {grabber.summary()}")
+        if self.camera is not None:
+            self.logger.log("System", f"Camera device: {self.camera.summary()}")
+        self.logger.log("System", f"Inference stats: {self.scheduler.summary()}")
+        if self.tracker is not None:
+            self.logger.log("System", f"Tracker stats: {self.tracker.summary()}")
+        if self.yolo_detector is not None and self.config.ROI_ENABLED:
+            self.logger.log("System", f"ROI stats: {self.yolo_detector.summary()}")
+        if self.governor is not None:
+            self.logger.log("System", f"Frame rate: {self.governor.summary()}")
+        self.logger.log("System", f"Distraction intervals: {self.intervals.summary()}")
+        if self.clips is not None:
+            self.logger.log("System", f"Evidence clips: {self.clips.summary()}")
+            self.clips.reset()
+    
+    # detection is (motion, (results, person, phone) or None) when the caller
+    # already ran motion and inference (multi-source batching)
+    def _process_frame(self, frame, current_time, detection=None):
+        m = self.metrics
+        t = m.clock()
+        
+        # Detect (in multi-process mode the pipeline already did both steps)
+        detector = self.yolo_detector
+        if isinstance(self.source, ProcessPipeline):
+            motion_detected, boxes, full_frame = self.source.detection
+            detection = (motion_detected, detector.from_boxes(frame, boxes, self.source.names, full_frame)
+                         if boxes is not None and detector is not None else None)
+        
+        if detection is not None:
+            motion_detected, fresh = detection
+            results, person_detected, phone_detected = self.scheduler.accept(fresh, current_time)
+            if isinstance(self.source, ProcessPipeline):
+                self.source.phone_seen.value = self.scheduler.last_phone
+        else:
+            motion_detected = self.presence_detector.detect_motion(frame)
+            t = m.lap("motion", t)
+            if detector is None:
+                # Model still loading: motion-only presence
+                results, person_detected, phone_detected = self.scheduler.accept(None, current_time)
+            else:
+                results, person_detected, phone_detected = self.scheduler.analyze(
+                    detector, frame, motion_detected, current_time)
+        if motion_detected:
+            m.count("motion_hits")
+        t = m.lap("inference" if self.scheduler.ran_inference else "inference_skipped", t)
+        
+        # Re-anchor the tracker on fresh detections, otherwise let it carry them
+        if self.tracker is not None:
+            if self.scheduler.ran_inference:
+                self.tracker.anchor(frame, detector.last_boxes, current_time)
+            else:
+                self.tracker.update(frame, current_time)
+                person_detected = self.tracker.is_tracking(self.config.CLASS_PERSON)
+                phone_detected = self.tracker.is_tracking(self.config.CLASS_PHONE)
+            t = m.lap("tracker", t)
+        
+        if self.trace is not None:
+            self.trace.record(current_time, self.presence_detector.motion.full_frame_pixels(),
+                              self._person_confidence())
+        
+        if self.clips is not None:
+            self.clips.push(frame, current_time)
+            t = m.lap("clip_ring", t)
+        
+        # Update presence
+        prev_score = self.presence_detector.update_score(person_detected, motion_detected, current_time)
+        change = self.presence_detector.check_presence_change(prev_score, current_time)
+        t = m.lap("presence", t)
+        
+        if change == "returned":
+            self.logger.log("Camera", "User returned")
+        elif change == "away":
+            last_seen = self.presence_detector.last_seen
+            self.logger.log("Distraction", "User Away from Desk", clip=self._clip("away", last_seen), since=last_seen)
+        
+        # Distractions that ended (unseen for their gap) get their duration
+        for _, _, _, duration, entry in self.intervals.expire(current_time):
+            self.logger.close_interval(entry, duration)
+        
+        # Phone detection
+        if phone_detected:
+            if self.intervals.see("Distraction", "Cell Phone Detected", current_time, self.config.PHONE_EVENT_GAP):
+                entry = self.logger.open_interval("Distraction", "Cell Phone Detected", current_time,
+                                                  self._clip("phone", current_time))
+                self.intervals.attach("Distraction", "Cell Phone Detected", entry)
+            if self.interactive:
+                self.phone_popup.show()
+        
+        # Screen distractions
+        distraction = self.distraction_monitor.check_distractions() if self.distraction_monitor else None
+        m.lap("window_poll", t)
+        if distraction and self.intervals.see("Distraction", f"App: {distraction}", current_time,
+                                              self.config.APP_EVENT_GAP):
+            entry = self.logger.open_interval("Distraction", f"App: {distraction}", current_time)
+            self.intervals.attach("Distraction", f"App: {distraction}", entry)
+        
+        if self.start_requested is not None:
+            elapsed = 1000 * (time.perf_counter() - self.start_requested)
+            self.logger.log("System", f"First frame analyzed {elapsed:.0f} ms after start")
+            self.start_requested = None
+        
+        # Decode / analyze the next frame at the rate the state calls for
+        if self.governor is not None:
+            self.source.set_rate(self.governor.update(
+                motion_detected, self.presence_detector.is_away, phone_detected, current_time))
+        
+        return results, phone_detected
+    
+    # Path of the evidence clip for an event at current_time (None when off)
+    def _clip(self, tag, event_time):
+        if self.clips is None:
+            return None
+        return self.clips.trigger(tag, event_time, self.logger.session_id)
+    
+    # Confidence behind person_detected: the fresh detection, the tracked box
+    # (fading between inferences) or, without a tracker, the carried result
+    def _person_confidence(self):
+        if self.yolo_detector is None:
+            return 0.0
+        if self.scheduler.ran_inference or self.tracker is None:
+            box = self.yolo_detector.last_boxes.get(self.config.CLASS_PERSON)
+            return box[1] if box is not None else 0.0
+        track = self.tracker.tracks.get(self.config.CLASS_PERSON)
+        return track["conf"] if track is not None else 0.0
+    
+    def _run_monitoring(self, cap=None):
+        if cap is None:
+            cap = self._open_camera()
+            if cap is None:
+                return
         
         self.logger.log("System", "Camera Active. Monitoring started.")
-        last_log_time = 0
+        self.intervals.reset()
         
+        m = self.metrics
         while self.is_monitoring:
+            t = m.clock()
             ret, frame = cap.read()
             if not ret:
                 break
+            m.lap("capture_wait", t)
+            m.count("frames_processed")
             
-            current_time = time.time()
-            
-            # Detect motion
-            motion_detected = self.presence_detector.detect_motion(frame)
-            
-            # Run YOLO detection
-            results, person_detected, phone_detected = self.yolo_detector.analyze(frame)
+            # Capture time, or the virtual clock during replay
+            current_time = cap.last_frame_time
+            results, _ = self._process_frame(frame, current_time)
             
             # Display frame
-            self._display_frame(results)
-            
-            # Update presence
-            prev_score = self.presence_detector.update_score(person_detected, motion_detected, current_time)
-            
-            # Check presence change
-            change = self.presence_detector.check_presence_change(prev_score, current_time)
-            if change == "returned":
-                self.logger.log("Camera", "User returned")
-            elif change == "away":
-                self.logger.log("Distraction", "User Away from Desk")
-            
-            # Handle phone detection
-            if phone_detected and current_time - last_log_time > 2.0:
-                self.logger.log("Distraction", "Cell Phone Detected")
-                self.phone_popup.show()
-                last_log_time = current_time
-            
-            # Check screen distractions
-            distraction = self.distraction_monitor.check_distractions()
-            if distraction and current_time - last_log_time > 2.0:
-                self.logger.log("Distraction", f"App: {distraction}")
-                last_log_time = current_time
+            t = m.clock()
+            self._display_frame(results, frame)
+            m.lap("display", t)
         
-        cap.release()
-        cv2.destroyAllWindows()
+        self._close_camera(cap)
         self.logger.log("System", "Monitoring stopped.")
     
     def _run_pomodoro(self):
@@ -429,6 +4385,9 @@ class FocusFrameEngine:
             if cycle < self.pomodoro_cycles:
                 self._run_break_period(cycle, self.pomodoro_break_min * 60)
         
+        # Completed or stopped (possibly during a break, when the camera was
+        # only suspended): either way it goes to the idle timer now
+        self.camera.release()
         if self.is_monitoring:
             self.logger.log("System", "Pomodoro session completed!")
             print("\n[Pomodoro] Session completed! Great work!")
@@ -437,48 +4396,28 @@ class FocusFrameEngine:
             self._generate_report()
     
     def _run_work_period(self, duration_seconds):
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            print("ERROR: Could not open camera.")
+        cap = self._open_camera()
+        if cap is None:
             return
         
         work_remaining = duration_seconds
         last_frame_time = time.time()
         timer_paused = False
-        last_log_time = 0
+        self.intervals.reset()
         
+        m = self.metrics
         while self.is_monitoring and work_remaining > 0:
+            t = m.clock()
             ret, frame = cap.read()
             if not ret:
                 break
+            m.lap("capture_wait", t)
+            m.count("frames_processed")
             
-            current_time = time.time()
+            current_time = cap.last_frame_time
             frame_delta = current_time - last_frame_time
             
-            # Detect
-            motion_detected = self.presence_detector.detect_motion(frame)
-            results, person_detected, phone_detected = self.yolo_detector.analyze(frame)
-            
-            # Update presence
-            prev_score = self.presence_detector.update_score(person_detected, motion_detected, current_time)
-            change = self.presence_detector.check_presence_change(prev_score, current_time)
-            
-            if change == "returned":
-                self.logger.log("Camera", "User returned")
-            elif change == "away":
-                self.logger.log("Distraction", "User Away from Desk")
-            
-            # Phone detection
-            if phone_detected and current_time - last_log_time > 2.0:
-                self.logger.log("Distraction", "Cell Phone Detected")
-                self.phone_popup.show()
-                last_log_time = current_time
-            
-            # Screen distractions
-            distraction = self.distraction_monitor.check_distractions()
-            if distraction and current_time - last_log_time > 2.0:
-                self.logger.log("Distraction", f"App: {distraction}")
-                last_log_time = current_time
+            results, phone_detected = self._process_frame(frame, current_time)
             
             # Timer pause logic
             should_pause = self.presence_detector.is_away or phone_detected or self.phone_popup.active
@@ -494,12 +4433,13 @@ class FocusFrameEngine:
                     timer_paused = True
             
             # Display with timer
-            self._display_frame_with_timer(results, int(max(0, work_remaining)), timer_paused)
+            t = m.clock()
+            self._display_frame_with_timer(results, frame, int(max(0, work_remaining)), timer_paused)
+            m.lap("display", t)
             
             last_frame_time = current_time
         
-        cap.release()
-        cv2.destroyAllWindows()
+        self._close_camera(cap)
     
     def _run_break_period(self, cycle, duration_seconds):
         self.logger.log("System", f"Pomodoro Cycle {cycle} - BREAK ({self.pomodoro_break_min} min)")
@@ -513,39 +4453,489 @@ class FocusFrameEngine:
             time.sleep(1)
         print()
     
-    def _display_frame(self, results):
-        try:
-            annotated_frame = results[0].plot()
-            cv2.imshow("FocusFrame Vision", annotated_frame)
-            cv2.waitKey(1)
-        except Exception:
-            pass
+    # Skipped inferences hand back the previous result, so always draw its
+    # boxes onto the current frame instead of the frame it was computed on.
+    # Pipeline frames live in a shared ring slot that's reused once the next
+    # frame is read, so the preview gets its own copy.
+    def _display_frame(self, results, frame):
+        if self.preview is not None:
+            if isinstance(self.source, ProcessPipeline):
+                frame = frame.copy()
+            self.preview.submit(results, frame)
     
-    def _display_frame_with_timer(self, results, remaining_seconds, paused):
-        try:
-            annotated_frame = results[0].plot()
-            mins, secs = divmod(remaining_seconds, 60)
-            status = "PAUSED" if paused else "FOCUS"
-            color = (0, 165, 255) if paused else (0, 255, 0)
-            cv2.putText(annotated_frame, f"{status}: {mins:02d}:{secs:02d}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-            cv2.imshow("FocusFrame Vision", annotated_frame)
-            cv2.waitKey(1)
-        except Exception:
-            pass
+    def _display_frame_with_timer(self, results, frame, remaining_seconds, paused):
+        if self.preview is None:
+            return
+        if isinstance(self.source, ProcessPipeline):
+            frame = frame.copy()
+        mins, secs = divmod(remaining_seconds, 60)
+        status = "PAUSED" if paused else "FOCUS"
+        color = (0, 165, 255) if paused else (0, 255, 0)
+        self.preview.submit(results, frame, (f"{status}: {mins:02d}:{secs:02d}", color))
+    
+    def recover_sessions(self):
+        for path in SessionJournal.find_unfinished(self.config.SESSION_DIR):
+            records = SessionJournal.read(path)
+            header = next(records, None)
+            if header is None or header.get("type") != "session":
+                continue
+            last_ts = header["start"]
+            for record in records:
+                last_ts = record.get("ts", last_ts)
+            
+            start_time = datetime.datetime.fromtimestamp(header["start"])
+            end_time = datetime.datetime.fromtimestamp(last_ts)
+            report = os.path.splitext(path)[0] + "_recovered.html"
+            self._write_report(header["id"], SessionJournal.events(path), start_time, end_time, report,
+                               open_browser=False)
+            
+            # Close it off so it isn't picked up again
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"type": "end", "end": last_ts, "recovered": True}) + "\n")
+            print(f">>> {self.config.APP_NAME}: Recovered unfinished session from {start_time:%Y-%m-%d %H:%M} -> {report}")
+    
+    # With a history store the session is recorded first, and the report is
+    # built from its stored aggregates plus the last few days of history
+    def _write_report(self, session_name, events, start_time, end_time, output_file, open_browser=True):
+        stats = history = None
+        if self.store is not None:
+            session_id = self.store.record_session(session_name, start_time.timestamp(), end_time.timestamp(), events)
+            events = self.store.session_events(session_id)
+            stats = self.store.load_stats(session_id)
+            history = self.store.daily(*SessionStore.day_range(self.config.HISTORY_REPORT_DAYS, end_time.date()))
+        ReportGenerator.generate(events, start_time, end_time, output_file, open_browser, stats=stats, history=history)
     
     def _generate_report(self):
-        ReportGenerator.generate(
-            self.logger.log_data,
+        self.logger.end_session(self.end_time)
+        self._write_report(
+            self.logger.session_id,
+            self.logger.events(),
             self.start_time,
             self.end_time,
             self.config.REPORT_FILE
         )
-        os._exit(0)
+        
+        # Stay resident with the model loaded (and the camera suspended) for
+        # the next session
+        self.session_thread = None
+        if self.interactive:
+            self.print_banner()
+
+
+# Watches several cameras / streams / recordings at once. Each source gets its
+# own FocusFrameEngine (presence state machine, scheduler, tracker, event log
+# and report) but they all share one YOLODetector: a tick reads one frame per
+# source, and every frame that needs inference goes through the model in a
+# single batched call.
+class MultiSourceMonitor:
+    def __init__(self, config, sources, output_dir, start_epoch=None):
+        self.config = copy.copy(config)
+        self.config.SESSION_DIR = os.path.join(output_dir, "journals")
+        self.output_dir = output_dir
+        self.start_epoch = start_epoch
+        self.detector = YOLODetector.from_config(self.config)
+        self.states = []
+        self.ticks = 0
+        self.batches = 0
+        self.batched_frames = 0
+        
+        for spec, name in zip(sources, self._source_names(sources)):
+            self.states.append({
+                "spec": spec,
+                "name": name,
+                "engine": FocusFrameEngine(self.config, interactive=False, detector=self.detector),
+                "source": None,
+            })
+    
+    # Cameras by index; files, directories and streams the same way replay
+    # names them (a/cam.mp4, b/cam.mp4 -> a_cam, b_cam), made file-name safe
+    @staticmethod
+    def _source_names(sources):
+        paths = iter(_replay_names([str(spec) for spec in sources if not str(spec).isdigit()]))
+        names, taken = [], set()
+        for spec in sources:
+            if str(spec).isdigit():
+                name = f"cam{spec}"
+            else:
+                name = "".join(c if c.isalnum() or c in "-_" else "_" for c in next(paths)) or "source"
+            while name in taken:
+                name += "_"
+            taken.add(name)
+            names.append(name)
+        return names
+    
+    # Camera index, video file / frame directory (replayed on its own clock),
+    # or anything else OpenCV can open (RTSP / HTTP URL)
+    def _open(self, spec):
+        if str(spec).isdigit():
+            source = FrameGrabber(int(spec), self.config.CAPTURE_BUFFER_SIZE, self.config.CAPTURE_READ_TIMEOUT,
+                                  self.config.CAPTURE_MAX_STALLS)
+        elif os.path.exists(spec):
+            source = ReplaySource(spec, self.config.REPLAY_FPS, self.start_epoch)
+        else:
+            source = FrameGrabber(spec, self.config.CAPTURE_BUFFER_SIZE, self.config.CAPTURE_READ_TIMEOUT,
+                                  self.config.CAPTURE_MAX_STALLS)
+        return source if source.start() else None
+    
+    def run(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        for state in self.states:
+            source = self._open(state["spec"])
+            if source is None:
+                print(f"ERROR: Could not open source {state['spec']}")
+                continue
+            state["source"] = source
+            start = source.start_epoch if isinstance(source, ReplaySource) else time.time()
+            state["engine"].attach(source, start, state["name"])
+            state["engine"].logger.log("System", f"Source {state['spec']} active. Monitoring started.")
+        
+        active = [state for state in self.states if state["source"] is not None]
+        try:
+            while active:
+                active = self.tick(active)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for state in self.states:
+                if state["source"] is not None and state["engine"].is_monitoring:
+                    self._finish(state)
+        
+        print(f"   {self.summary()}")
+        return [self._report(state) for state in self.states if state["source"] is not None]
+    
+    def tick(self, active):
+        ticked = []
+        for state in active:
+            source = state["source"]
+            ret, frame = source.read()
+            if not ret:
+                self._finish(state)
+                continue
+            engine = state["engine"]
+            motion = engine.presence_detector.detect_motion(frame)
+            run = engine.scheduler.should_run(motion, source.last_frame_time)
+            ticked.append((state, frame, motion, run))
+        
+        need = [item for item in ticked if item[3]]
+        outputs = iter(())
+        if need:
+            outputs = iter(self.detector.analyze_batch([item[1] for item in need]))
+            boxes = iter(self.detector.last_batch_boxes)
+            self.batches += 1
+            self.batched_frames += len(need)
+        
+        for state, frame, motion, run in ticked:
+            fresh = None
+            if run:
+                fresh = next(outputs)
+                # The tracker re-anchors on the detector's last boxes
+                self.detector.last_boxes = next(boxes)
+            state["engine"]._process_frame(frame, state["source"].last_frame_time, (motion, fresh))
+        
+        self.ticks += 1
+        return [item[0] for item in ticked]
+    
+    def _finish(self, state):
+        engine = state["engine"]
+        engine._close_camera(state["source"])
+        engine.logger.log("System", "Monitoring stopped.")
+        engine.detach()
+    
+    def _report(self, state):
+        engine = state["engine"]
+        report = os.path.join(self.output_dir, f"{state['name']}_report.html")
+        ReportGenerator.generate(engine.logger.events(), engine.start_time, engine.end_time, report,
+                                 open_browser=False)
+        print(f"   [{state['name']}] {state['source'].summary()}")
+        print(f"   [{state['name']}] Report: {report}")
+        return {"source": state["spec"], "report": report, "journal": engine.logger.journal.path}
+    
+    def summary(self):
+        mean = self.batched_frames / self.batches if self.batches else 0.0
+        return (f"{len(self.states)} sources, {self.ticks} ticks, {self.batched_frames} frames inferred "
+                f"in {self.batches} batched calls ({mean:.1f} per call)")
 
 
 # CLI & MAIN
 
+# One engine (and model) per replay process, reused for every file it replays
+def _replay_engine(config, output_dir):
+    config = copy.copy(config)
+    config.SESSION_DIR = os.path.join(output_dir, "journals")
+    return FocusFrameEngine(config, interactive=False)
+
+
+def replay_file(path, engine, output_dir, start_epoch=None, name=None):
+    config = engine.config
+    stem = name or os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    source = ReplaySource(path, config.REPLAY_FPS, start_epoch)
+    if not source.start():
+        return {"path": path, "error": "could not open"}
+    engine.trace = PresenceTrace(source.start_epoch) if config.TRACE_DIR else None
+    
+    engine.replay(source, stem)
+    
+    report = os.path.join(output_dir, f"{stem}_report.html")
+    ReportGenerator.generate(engine.logger.events(), engine.start_time, engine.end_time, report,
+                             open_browser=False)
+    outcome = {"path": path, "report": report, "journal": engine.logger.journal.path, "summary": source.summary()}
+    if engine.trace is not None:
+        os.makedirs(config.TRACE_DIR, exist_ok=True)
+        outcome["trace"] = os.path.join(config.TRACE_DIR, f"{stem}.npz")
+        engine.trace.save(outcome["trace"], source=path, motion_width=config.MOTION_WIDTH,
+                          motion_mode=config.MOTION_MODE, conf_threshold=config.CONF_THRESHOLD,
+                          inference_policy=config.INFERENCE_POLICY, tracker=config.TRACKER_ENABLED)
+    return outcome
+
+
+def _limit_threads(threads):
+    # Each worker gets a slice of the cores instead of every worker's OpenCV /
+    # torch pool trying to use all of them
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+_worker_engine = None
+
+
+def _init_replay_worker(config, output_dir, threads):
+    global _worker_engine
+    _limit_threads(threads)
+    _worker_engine = _replay_engine(config, output_dir)
+
+
+def _replay_in_worker(path, output_dir, start_epoch, name):
+    return replay_file(path, _worker_engine, output_dir, start_epoch, name)
+
+
+# Output names for a batch of replays: the file's stem, or for a stem that
+# occurs more than once, its path below the duplicates' common folder
+# (day1/cam.mp4, day2/cam.mp4 -> day1_cam, day2_cam)
+def _replay_names(paths):
+    stems = [os.path.splitext(os.path.basename(os.path.normpath(path)))[0] for path in paths]
+    bare = [os.path.splitext(os.path.abspath(path))[0] for path in paths]
+    groups = {}
+    for stem, path in zip(stems, bare):
+        groups.setdefault(stem, []).append(os.path.dirname(path))
+    
+    names, taken = [], set()
+    for stem, path in zip(stems, bare):
+        name = stem
+        if len(groups[stem]) > 1:
+            name = os.path.relpath(path, os.path.commonpath(groups[stem])).replace(os.sep, "_")
+        while name in taken:
+            name += "_"
+        taken.add(name)
+        names.append(name)
+    return names
+
+
+def run_replay(paths, config, workers, output_dir, start_epoch=None):
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, len(paths)))
+    names = _replay_names(paths)
+    
+    if workers == 1:
+        engine = _replay_engine(config, output_dir)
+        outcomes = (replay_file(path, engine, output_dir, start_epoch, name) for path, name in zip(paths, names))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = ProcessPoolExecutor(workers, initializer=_init_replay_worker, initargs=(config, output_dir, threads))
+        futures = [pool.submit(_replay_in_worker, path, output_dir, start_epoch, name)
+                   for path, name in zip(paths, names)]
+        outcomes = (future.result() for future in as_completed(futures))
+    
+    results = []
+    for outcome in outcomes:
+        print("\n" + "-"*60)
+        print(f"   REPLAY: {outcome['path']}")
+        print("-"*60)
+        if "error" in outcome:
+            print(f"   ERROR: {outcome['error']}")
+        else:
+            for entry in SessionJournal.events(outcome["journal"]):
+                print(EventLogger.format(entry))
+            print(f"   {outcome['summary']}")
+            print(f"   Report: {outcome['report']}")
+            if "trace" in outcome:
+                print(f"   Trace: {outcome['trace']}")
+        results.append(outcome)
+    
+    if workers > 1:
+        pool.shutdown()
+    return results
+
+
+def run_history(args):
+    store = SessionStore(args.db)
+    until = args.until or datetime.date.today()
+    if args.month:
+        since, until = until.replace(day=1).isoformat(), until.isoformat()
+    elif args.since:
+        since, until = args.since.isoformat(), until.isoformat()
+    else:
+        since, until = SessionStore.day_range(args.days, until)
+    
+    started = time.perf_counter()
+    if args.query == 'import':
+        rows = store.import_journals(args.sessions_dir)
+        for path in rows:
+            print(f"   Imported {path}")
+    elif args.query == 'report':
+        rows = store.daily(since, until)
+        ReportGenerator.generate_history(store, since, until, args.output)
+        print(f"   Report: {args.output}")
+    elif args.query == 'daily':
+        rows = store.daily(since, until)
+        print(f"   {'Day':<12}{'Sessions':>9}{'Focused min':>13}{'Away min':>10}{'Phone':>7}{'Phone min':>11}"
+              f"{'Apps':>7}{'Apps min':>10}")
+        for day, sessions, focused, away, phone, apps, phone_seconds, app_seconds in rows:
+            print(f"   {day:<12}{sessions:>9}{focused / 60:>13.1f}{away / 60:>10.1f}{phone:>7}{phone_seconds / 60:>11.1f}"
+                  f"{apps:>7}{app_seconds / 60:>10.1f}")
+    elif args.query == 'hourly':
+        rows = store.hourly(since, until)
+        print(f"   {'Hour':<15}{'Focused min':>13}{'Away min':>10}{'Phone':>7}{'Phone min':>11}{'Apps':>7}{'Apps min':>10}")
+        for hour, focused, away, phone, apps, phone_seconds, app_seconds in rows:
+            print(f"   {hour + ':00':<15}{focused / 60:>13.1f}{away / 60:>10.1f}{phone:>7}{phone_seconds / 60:>11.1f}"
+                  f"{apps:>7}{app_seconds / 60:>10.1f}")
+    elif args.query == 'apps':
+        rows = store.top_apps(since, until, args.limit)
+        print(f"   {'App':<40}{'Times logged':>13}{'Minutes':>9}")
+        for app, count, seconds in rows:
+            print(f"   {app[:39]:<40}{count:>13}{seconds / 60:>9.1f}")
+    else:
+        rows = store.sessions(args.limit)
+        print(f"   {'Session':<28}{'Minutes':>8}{'Focused min':>13}{'Away min':>10}{'Phone':>7}{'Apps':>7}")
+        for name, start_ts, end_ts, focused, away, phone, apps, _ in rows:
+            print(f"   {name:<28}{(end_ts - start_ts) / 60:>8.1f}{focused / 60:>13.1f}{away / 60:>10.1f}"
+                  f"{phone:>7}{apps:>7}")
+    
+    period = "" if args.query in ('import', 'sessions') else f"{since} - {until}, "
+    print(f"   ({period}{len(rows)} rows, {1000 * (time.perf_counter() - started):.1f} ms)")
+    store.close()
+
+
+# "start:stop:step" (stop included) or "a,b,c"
+def _grid(spec, cast=float):
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        values = np.arange(start, stop + step / 2, step)
+    else:
+        values = [float(v) for v in spec.split(",")]
+    return [cast(round(float(v), 6)) for v in values]
+
+
+def run_tune(args):
+    with open(args.labels, encoding="utf-8") as f:
+        labels = json.load(f)
+    traces, frames, seconds = [], 0, 0.0
+    for path in args.traces:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name not in labels:
+            print(f"   No labels for {name}, skipped")
+            continue
+        t, motion, person, _ = PresenceTrace.load(path)
+        if len(t):
+            traces.append((t, motion, person, [tuple(interval) for interval in labels[name]]))
+            frames += len(t)
+            seconds += float(t[-1])
+    if not traces:
+        print("   Nothing to tune on")
+        return
+    
+    grid = {
+        "confs": _grid(args.person_conf),
+        "absence": _grid(args.absence_time),
+        "presence": _grid(args.presence_threshold, int),
+        "decrement": _grid(args.decrement_interval),
+        "score_max": Config.PRESENCE_SCORE_MAX,
+        "increment": Config.SCORE_INCREMENT,
+        "score_decrement": Config.SCORE_DECREMENT,
+    }
+    thresholds = _grid(args.motion_threshold)
+    
+    # One task per trace and slice of the motion thresholds, enough slices
+    # to keep every worker busy
+    started = time.perf_counter()
+    workers = max(1, args.workers)
+    slices = [list(chunk) for chunk in np.array_split(thresholds, min(len(thresholds), -(-workers // len(traces))))]
+    tasks = [(chunk, trace) for chunk in slices for trace in traces]
+    if workers == 1:
+        parts = [_sweep_chunk(grid, chunk, trace, args.tolerance) for chunk, trace in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(min(workers, len(tasks)), initializer=_limit_threads, initargs=(1,)) as pool:
+            futures = [pool.submit(_sweep_chunk, grid, chunk, trace, args.tolerance) for chunk, trace in tasks]
+            parts = [future.result() for future in futures]
+    
+    # Sum each slice over the traces, then put the slices side by side
+    params, stats = {}, {}
+    for n, chunk in enumerate(slices):
+        sweep = PresenceSweep(grid["confs"], chunk, grid["absence"], grid["presence"], grid["decrement"])
+        totals = parts[n * len(traces)]
+        for part in parts[n * len(traces) + 1:(n + 1) * len(traces)]:
+            totals = {key: totals[key] + part[key] for key in totals}
+        for target, values in ((params, sweep.combinations()), (stats, totals)):
+            for key, value in values.items():
+                target.setdefault(key, []).append(value)
+    params = {key: np.concatenate(value) for key, value in params.items()}
+    stats = {key: np.concatenate(value) for key, value in stats.items()}
+    elapsed = time.perf_counter() - started
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(stats["predicted"] > 0, stats["matched"] / stats["predicted"], 0.0)
+        recall = np.where(stats["labeled"] > 0, stats["matched"] / stats["labeled"], 1.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        latency = np.where(stats["matched"] > 0, stats["latency"] / stats["matched"], np.nan)
+    wrong = stats["away_time"] + stats["label_away_time"] - 2 * stats["overlap"]
+    accuracy = 1.0 - wrong / np.maximum(stats["total_time"], 1e-9)
+    order = np.lexsort((np.nan_to_num(np.abs(latency), nan=np.inf), -accuracy, -f1))
+    
+    total = len(order)
+    print(f"   Evaluated {total} configurations over {seconds / 3600:.2f} h of footage "
+          f"({frames} frames, {len(traces)} traces) in {elapsed:.2f}s "
+          f"({total * frames / max(elapsed, 1e-9) / 1e6:.0f}M frame-configs/s)")
+    print(f"   {'Rank':>5}{'Motion':>8}{'Absence':>9}{'Presence':>10}{'Decrement':>11}{'Conf':>6}"
+          f"{'F1':>7}{'Prec':>7}{'Recall':>8}{'Accuracy':>10}{'Latency':>9}{'Events':>8}")
+    
+    def row(rank, i):
+        lat = f"{latency[i]:.1f}s" if not np.isnan(latency[i]) else "-"
+        return (f"   {rank:>5}{params['motion_threshold'][i]:>8.0f}{params['absence_time'][i]:>9.2f}"
+                f"{params['presence_threshold'][i]:>10}{params['decrement_interval'][i]:>11.2f}"
+                f"{params['person_conf'][i]:>6.2f}{f1[i]:>7.2f}{precision[i]:>7.2f}{recall[i]:>8.2f}"
+                f"{100 * accuracy[i]:>9.1f}%{lat:>9}{stats['predicted'][i]:>8}")
+    
+    for rank, i in enumerate(order[:args.top], 1):
+        print(row(rank, i))
+    
+    # Where the built-in defaults land, if they're on the grid
+    current = np.flatnonzero(
+        (params["motion_threshold"] == Config.MOTION_PIXEL_THRESHOLD)
+        & (params["absence_time"] == Config.ABSENCE_TIME)
+        & (params["presence_threshold"] == Config.PRESENCE_THRESHOLD)
+        & (params["decrement_interval"] == Config.DECREMENT_INTERVAL)
+        & (params["person_conf"] == 0)
+    )
+    if len(current):
+        print("   Defaults:")
+        print(row(int(np.flatnonzero(order == current[0])[0]) + 1, current[0]))
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write("rank," + ",".join(params) + ",f1,precision,recall,accuracy,latency,events\n")
+            for rank, i in enumerate(order, 1):
+                values = [params[key][i] for key in params]
+                f.write(f"{rank}," + ",".join(str(v) for v in values)
+                        + f",{f1[i]:.4f},{precision[i]:.4f},{recall[i]:.4f},{accuracy[i]:.4f},"
+                          f"{latency[i]:.3f},{stats['predicted'][i]}\n")
+        print(f"   All results: {args.output}")
+
+
 def setup_pomodoro_interactive(app):
     print("\n" + "-"*50)
     print("   POMODORO SETUP")
@@ -576,21 +4966,197 @@ def main():
     )
     
     parser.add_argument('--motion-threshold', type=int, default=Config.MOTION_PIXEL_THRESHOLD)
+    parser.add_argument('--motion-width', type=int, default=Config.MOTION_WIDTH)
+    parser.add_argument('--motion-mode', choices=MotionDetector.MODES, default=Config.MOTION_MODE)
     parser.add_argument('--decrement-interval', type=float, default=Config.DECREMENT_INTERVAL)
     parser.add_argument('--absence-time', type=float, default=Config.ABSENCE_TIME)
     parser.add_argument('--presence-threshold', type=int, default=Config.PRESENCE_THRESHOLD)
+    parser.add_argument('--inference-policy', choices=['always', 'motion'], default=Config.INFERENCE_POLICY)
+    parser.add_argument('--keepalive-frames', type=int, default=Config.KEEPALIVE_FRAMES)
+    parser.add_argument('--keepalive-ms', type=int, default=Config.KEEPALIVE_MS)
+    parser.add_argument('--no-phone-retrigger', action='store_true')
+    parser.add_argument('--no-tracker', action='store_true')
+    parser.add_argument('--result-cache', action='store_true')
+    parser.add_argument('--governor', action='store_true')
+    parser.add_argument('--fps-present', type=float, default=Config.FPS_PRESENT)
+    parser.add_argument('--fps-away', type=float, default=Config.FPS_AWAY)
+    parser.add_argument('--fps-phone', type=float, default=Config.FPS_PHONE)
+    parser.add_argument('--fps-break', type=float, default=Config.FPS_BREAK)
+    parser.add_argument('--fps-min', type=float, default=Config.FPS_MIN)
+    parser.add_argument('--fps-max', type=float, default=Config.FPS_MAX)
+    parser.add_argument('--cpu-budget', type=float, default=Config.GOVERNOR_CPU_BUDGET)
+    parser.add_argument('--load-high', type=float, default=Config.GOVERNOR_LOAD_HIGH)
+    parser.add_argument('--result-cache-max-diff', type=int, default=Config.RESULT_CACHE_MAX_DIFF)
+    parser.add_argument('--result-cache-max-age', type=float, default=Config.RESULT_CACHE_MAX_AGE)
+    parser.add_argument('--backend', choices=['auto', 'pytorch', 'onnx', 'openvino'], default=Config.INFERENCE_BACKEND)
+    parser.add_argument('--imgsz', type=int, default=Config.IMGSZ)
+    parser.add_argument('--int8', action='store_true')
+    parser.add_argument('--rules', help="JSON file with extra deny / allow / per-app distraction rules")
+    parser.add_argument('--window-poll-interval', type=float, default=Config.WINDOW_POLL_INTERVAL)
+    parser.add_argument('--phone-event-gap', type=float, default=Config.PHONE_EVENT_GAP,
+                        help="Seconds without a phone sighting that end a phone distraction")
+    parser.add_argument('--app-event-gap', type=float, default=Config.APP_EVENT_GAP,
+                        help="Seconds an app must be out of focus to end its distraction")
+    parser.add_argument('--clips', action='store_true',
+                        help="Save a short clip around each phone / away event and link it from the report")
+    parser.add_argument('--clip-dir', default=Config.CLIP_DIR)
+    parser.add_argument('--clip-pre', type=float, default=Config.CLIP_PRE_SECONDS, help="Seconds before the event")
+    parser.add_argument('--clip-post', type=float, default=Config.CLIP_POST_SECONDS, help="Seconds after the event")
+    parser.add_argument('--clip-quota-mb', type=float, default=Config.CLIP_QUOTA_MB,
+                        help="Oldest clips are deleted once the clip directory grows past this")
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--preview-fps', type=float, default=Config.PREVIEW_FPS)
+    parser.add_argument('--inference-server', nargs='?', const=Config.INFERENCE_SOCKET, metavar='SOCKET',
+                        help="Use a running 'serve' daemon instead of loading the model (default socket: %(const)s)")
+    parser.add_argument('--roi', action='store_true')
+    parser.add_argument('--roi-imgsz', type=int, default=Config.ROI_IMGSZ)
+    parser.add_argument('--roi-full-frame-interval', type=float, default=Config.ROI_FULL_FRAME_INTERVAL)
+    
+    parser.add_argument('--camera-idle-timeout', type=float, default=Config.CAMERA_IDLE_TIMEOUT,
+                        help="Seconds to keep the camera open (suspended) after a session ends")
+    parser.add_argument('--preopen-camera', action='store_true', help="Open the camera at launch so the first session starts warm")
+    
+    parser.add_argument('--pipeline-workers', type=int, default=Config.PIPELINE_WORKERS,
+                        help="Run capture and YOLO in separate processes with N inference workers (0 = off)")
+    parser.add_argument('--pipeline-slots', type=int, default=Config.PIPELINE_SLOTS,
+                        help="Frames in the shared-memory ring (default: 2 per worker + 2)")
+    
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument('--metrics-file', help="Periodically write Prometheus metrics to this file")
+    parser.add_argument('--metrics-interval', type=float, default=Config.METRICS_INTERVAL)
+    parser.add_argument('--replay', nargs='+', metavar='PATH',
+                        help="Analyze video files / frame directories instead of the webcam, then exit")
+    parser.add_argument('--replay-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--replay-output', default=Config.REPLAY_OUTPUT_DIR)
+    parser.add_argument('--replay-fps', type=float, default=Config.REPLAY_FPS,
+                        help="Frame rate for frame directories and videos without one")
+    parser.add_argument('--replay-start', type=datetime.datetime.fromisoformat,
+                        help="Wall-clock time of the first frame (default: file modification time)")
+    parser.add_argument('--trace-dir', help="With --replay: also record presence traces here for 'tune'")
+    parser.add_argument('--sources', nargs='+', metavar='SRC',
+                        help="Monitor several camera indexes / stream URLs / video files at once, "
+                             "with one batched YOLO call per tick and a report per source")
+    parser.add_argument('--sources-output', default=Config.SOURCES_OUTPUT_DIR)
+    parser.add_argument('--no-history', action='store_true', help="Don't record sessions in the history store")
+    
+    subcommands = parser.add_subparsers(dest='command')
+    history = subcommands.add_parser('history', help="Query the session history store")
+    history.add_argument('query', choices=['daily', 'hourly', 'apps', 'sessions', 'import', 'report'])
+    history.add_argument('--db', default=Config.HISTORY_DB)
+    history.add_argument('--days', type=int, default=30)
+    history.add_argument('--since', type=datetime.date.fromisoformat)
+    history.add_argument('--until', type=datetime.date.fromisoformat)
+    history.add_argument('--month', action='store_true', help="From the 1st of the month of --until (default: today)")
+    history.add_argument('--limit', type=int, default=10)
+    history.add_argument('--sessions-dir', default=Config.SESSION_DIR, help="Journals to import")
+    history.add_argument('--output', default="focus_frame_history.html")
+    
+    tune = subcommands.add_parser('tune', help="Sweep presence-smoothing parameters over recorded traces")
+    tune.add_argument('traces', nargs='+', help="Traces recorded with --replay ... --trace-dir")
+    tune.add_argument('--labels', required=True,
+                      help='JSON: {"<trace name>": [[away start, away end], ...]}, seconds from the start')
+    tune.add_argument('--motion-threshold', default="500:4000:250", help="start:stop:step or a,b,c")
+    tune.add_argument('--absence-time', default="2:15:1")
+    tune.add_argument('--presence-threshold', default="1:5:1")
+    tune.add_argument('--decrement-interval', default="0.1:1.0:0.05")
+    tune.add_argument('--person-conf', default="0", help="Person counts when its confidence is above this (0 = as recorded)")
+    tune.add_argument('--tolerance', type=float, default=10.0, help="Seconds an away / return may be off and still match")
+    tune.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    tune.add_argument('--top', type=int, default=10)
+    tune.add_argument('--output', help="Write every combination, ranked, to this CSV file")
+    
+    serve = subcommands.add_parser('serve', help="Run a shared inference daemon for other FocusFrame instances "
+                                                 "(model options such as --backend / --imgsz go before 'serve')")
+    serve.add_argument('--socket', default=Config.INFERENCE_SOCKET)
+    serve.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    serve.add_argument('--max-latency-ms', type=float, default=Config.INFERENCE_MAX_LATENCY_MS,
+                       help="How long the oldest request may wait for a batch to fill")
     
     args = parser.parse_args()
+    # The pipeline's capture process decides which frames go to inference and
+    # has no result cache
+    if args.pipeline_workers > 0 and args.result_cache:
+        parser.error("--result-cache can't be combined with --pipeline-workers")
+    
+    if args.command == 'history':
+        run_history(args)
+        return
+    if args.command == 'tune':
+        run_tune(args)
+        return
     
     # Apply CLI configuration
     config = Config()
     config.MOTION_PIXEL_THRESHOLD = args.motion_threshold
+    config.MOTION_WIDTH = args.motion_width
+    config.MOTION_MODE = args.motion_mode
     config.DECREMENT_INTERVAL = args.decrement_interval
     config.ABSENCE_TIME = args.absence_time
     config.PRESENCE_THRESHOLD = args.presence_threshold
+    config.INFERENCE_POLICY = args.inference_policy
+    config.KEEPALIVE_FRAMES = args.keepalive_frames
+    config.KEEPALIVE_MS = args.keepalive_ms
+    config.PHONE_RETRIGGER = not args.no_phone_retrigger
+    config.TRACKER_ENABLED = not args.no_tracker
+    config.RESULT_CACHE_ENABLED = args.result_cache
+    config.GOVERNOR_ENABLED = args.governor
+    config.FPS_PRESENT = args.fps_present
+    config.FPS_AWAY = args.fps_away
+    config.FPS_PHONE = args.fps_phone
+    config.FPS_BREAK = args.fps_break
+    config.FPS_MIN = args.fps_min
+    config.FPS_MAX = args.fps_max
+    config.GOVERNOR_CPU_BUDGET = args.cpu_budget
+    config.GOVERNOR_LOAD_HIGH = args.load_high
+    config.RESULT_CACHE_MAX_DIFF = args.result_cache_max_diff
+    config.RESULT_CACHE_MAX_AGE = args.result_cache_max_age
+    config.INFERENCE_BACKEND = args.backend
+    config.IMGSZ = args.imgsz
+    config.INT8 = args.int8
+    config.INFERENCE_SERVER = args.inference_server
+    config.DISTRACTION_RULES_FILE = args.rules
+    config.WINDOW_POLL_INTERVAL = args.window_poll_interval
+    config.PHONE_EVENT_GAP = args.phone_event_gap
+    config.APP_EVENT_GAP = args.app_event_gap
+    config.CLIPS_ENABLED = args.clips
+    config.CLIP_DIR = args.clip_dir
+    config.CLIP_PRE_SECONDS = args.clip_pre
+    config.CLIP_POST_SECONDS = args.clip_post
+    config.CLIP_QUOTA_MB = args.clip_quota_mb
+    config.HEADLESS = args.headless
+    config.PREVIEW_FPS = args.preview_fps
+    config.ROI_ENABLED = args.roi
+    config.ROI_IMGSZ = args.roi_imgsz
+    config.ROI_FULL_FRAME_INTERVAL = args.roi_full_frame_interval
+    config.CAMERA_IDLE_TIMEOUT = args.camera_idle_timeout
+    config.CAMERA_PREOPEN = args.preopen_camera
+    config.PIPELINE_WORKERS = args.pipeline_workers
+    config.PIPELINE_SLOTS = args.pipeline_slots
+    
+    config.REPLAY_FPS = args.replay_fps
+    config.TRACE_DIR = args.trace_dir
+    config.METRICS_PORT = args.metrics_port
+    config.METRICS_FILE = args.metrics_file
+    config.METRICS_INTERVAL = args.metrics_interval
+    if args.no_history:
+        config.HISTORY_DB = None
+    
+    if args.command == 'serve':
+        InferenceServer(config, args.socket, args.max_batch, args.max_latency_ms / 1000).serve()
+        return
+    
+    start_epoch = args.replay_start.timestamp() if args.replay_start else None
+    if args.replay:
+        run_replay(args.replay, config, args.replay_workers, args.replay_output, start_epoch)
+        return
+    
+    if args.sources:
+        MultiSourceMonitor(config, args.sources, args.sources_output, start_epoch).run()
+        return
     
     # Create engine
     app = FocusFrameEngine(config)
+    app.recover_sessions()
     app.print_banner()
     
     # 'p' command
@@ -609,6 +5175,7 @@ def main():
     threading.Thread(target=input_listener, daemon=True).start()
     
     # Hotkey listener
+    from pynput import keyboard
     with keyboard.GlobalHotKeys({
         '<ctrl>+<alt>+<enter>': app.start_session,
         '<ctrl>+<alt>+<backspace>': app.stop_session
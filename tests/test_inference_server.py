@@ -0,0 +1,115 @@
+# Kills the 'serve' daemon under a running client. Uses the yolov8n.yaml
+# architecture (random weights, nothing to download), so only the plumbing is
+# checked, not the detections.
+
+import os
+import sys
+import signal
+import subprocess
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from focus_frame import Config, InferenceClient, YOLODetector
+
+MODEL = "yolov8n.yaml"
+IMGSZ = 320
+
+SERVER = r"""
+import sys
+sys.path.insert(0, {root!r})
+import focus_frame
+config = focus_frame.Config()
+config.MODEL_NAME = {model!r}
+config.IMGSZ = {imgsz!r}
+config.BACKEND_WARMUP_RUNS = 1
+server = focus_frame.InferenceServer(config, {socket!r}, 4, 0.005)
+{setup}
+server.serve()
+"""
+
+# Every inference fails, so each infer request gets an error reply
+BROKEN = """
+def predict(*args):
+    raise RuntimeError("out of memory")
+server.detector.predict = predict
+"""
+
+
+def start_server(socket_path, setup=""):
+    code = SERVER.format(root=ROOT, model=MODEL, imgsz=IMGSZ, socket=socket_path, setup=setup)
+    server = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, text=True)
+    for line in server.stdout:
+        if line.startswith(f">>> {Config.APP_NAME}: INFERENCE SERVER"):
+            return server
+    raise RuntimeError("inference server exited before listening")
+
+
+def kill(server):
+    server.send_signal(signal.SIGKILL)
+    server.wait()
+    server.stdout.close()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "inference.sock")
+
+
+@pytest.fixture
+def frame():
+    return np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+
+
+def test_detector_falls_back_to_local_model_when_daemon_dies(socket_path, frame):
+    server = start_server(socket_path)
+    try:
+        detector = YOLODetector(MODEL, [Config.CLASS_PERSON, Config.CLASS_PHONE], Config.CONF_THRESHOLD,
+                                imgsz=IMGSZ, warmup_runs=1, server=socket_path, server_timeout=5.0)
+        assert detector.backend == "server"
+        detector.analyze(frame)
+    finally:
+        kill(server)
+
+    results, _, _ = detector.analyze(frame)
+    assert detector.backend == "pytorch"
+    assert len(results) == 1
+    detector.analyze(frame)
+    assert detector.full_passes == 3
+
+
+def test_detector_falls_back_to_local_model_on_error_replies(socket_path, frame):
+    server = start_server(socket_path, BROKEN)
+    try:
+        detector = YOLODetector(MODEL, [Config.CLASS_PERSON, Config.CLASS_PHONE], Config.CONF_THRESHOLD,
+                                imgsz=IMGSZ, warmup_runs=1, server=socket_path, server_timeout=5.0)
+        assert detector.backend == "server"
+        results, _, _ = detector.analyze(frame)
+        assert detector.backend == "pytorch"
+        assert len(results) == 1
+    finally:
+        kill(server)
+
+
+def test_client_reconnects_on_the_call_after_a_failed_one(socket_path, frame):
+    server = start_server(socket_path)
+    try:
+        client = InferenceClient(socket_path, 5.0)
+        assert len(client(frame, classes=[Config.CLASS_PERSON], imgsz=IMGSZ)) == 1
+    finally:
+        kill(server)
+
+    with pytest.raises(OSError):
+        client(frame, classes=[Config.CLASS_PERSON], imgsz=IMGSZ)
+    assert client.sock is None
+
+    server = start_server(socket_path)
+    try:
+        assert len(client(frame, classes=[Config.CLASS_PERSON], imgsz=IMGSZ)) == 1
+        assert client.requests == 2
+    finally:
+        client.close()
+        kill(server)